@@ -8,7 +8,7 @@ export default function Dashboard() {
   const [sets, setSets] = useState([]);
 
   useEffect(() => {
-    api("/api/gigs").then((d) => setGigs(d.gigs)).catch(() => setGigs([]));
+    api("/api/gigs?limit=5").then((d) => setGigs(d.gigs)).catch(() => setGigs([]));
     api("/api/sets").then((d) => setSets(d.sets)).catch(() => setSets([]));
   }, [api]);
 
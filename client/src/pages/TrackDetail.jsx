@@ -73,7 +73,7 @@ export default function TrackDetail() {
         <div key={u.set_item_id} style={{ padding: 12, border: "1px solid #eee", marginBottom: 10 }}>
           <div style={{ fontWeight: 600 }}>
             <Link to={`/sets/${u.set_id}`} style={{ textDecoration: "none" }}>{u.set_name}</Link>
-            <span style={{ opacity: 0.8 }}> • position {u.position + 1}</span>
+            <span style={{ opacity: 0.8 }}> • position {u.index + 1}</span>
           </div>
           <div style={{ opacity: 0.85, marginTop: 6 }}>
             {u.gig ? (
@@ -7,8 +7,9 @@ except ModuleNotFoundError:
     Migrate = None
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
+from .engine import RoutingSession, configure_engines, init_replica, install_pragmas
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate() if Migrate else None
 
 def create_app(test_config=None):
@@ -16,6 +17,27 @@ def create_app(test_config=None):
     app = Flask(__name__)
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "1") == "1"
+    app.config["CACHE_BACKEND"] = os.getenv("CACHE_BACKEND", "memory")
+    app.config["CACHE_PATH"] = os.getenv("CACHE_PATH", "cache.db")
+    app.config["CACHE_MAX_BYTES"] = int(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    app.config["CACHE_TTL"] = int(os.getenv("CACHE_TTL", 300))
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    app.config["DB_PROFILE"] = os.getenv("DB_PROFILE", "tuned")
+    app.config["DB_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", 10))
+    app.config["DB_MAX_OVERFLOW"] = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    app.config["DB_POOL_TIMEOUT"] = int(os.getenv("DB_POOL_TIMEOUT", 10))
+    app.config["DB_POOL_RECYCLE"] = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    app.config["DB_POOL_PRE_PING"] = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    app.config["SQLITE_SYNCHRONOUS"] = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    app.config["SQLITE_MMAP_SIZE"] = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    app.config["DATABASE_REPLICA_URL"] = os.getenv("DATABASE_REPLICA_URL") or None
+    app.config["REPLICA_STICKY_SECONDS"] = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+    app.config["EVENTS_HEARTBEAT"] = float(os.getenv("EVENTS_HEARTBEAT", 15))
+    app.config["EVENTS_QUEUE_SIZE"] = int(os.getenv("EVENTS_QUEUE_SIZE", 256))
+    app.config["EVENTS_MAX_PER_USER"] = int(os.getenv("EVENTS_MAX_PER_USER", 10))
 
     if test_config:
         app.config.update(test_config)
@@ -23,8 +45,26 @@ def create_app(test_config=None):
         database_url = os.getenv("DATABASE_URL", "sqlite:///app.db")
         app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 
+    configure_engines(app)
     db.init_app(app)
     (migrate.init_app(app, db) if migrate else None)
+    replica = init_replica(app)
+    with app.app_context():
+        install_pragmas(app, [db.engine, *([replica] if replica else [])])
+
+    if app.config["METRICS_ENABLED"]:
+        from .metrics import init_metrics
+        with app.app_context():
+            init_metrics(app, db.engine)
+
+    from .cache import init_cache
+    from .passwords import init_passwords
+    from .serialization import init_serialization
+    from .events import init_events
+    cache = init_cache(app)
+    init_passwords(app)
+    init_serialization(app)
+    events = init_events(app)
 
     CORS(app, supports_credentials=True, resources={r"/api/*": {"origins": ["http://localhost:5173"]}})
 
@@ -32,14 +72,39 @@ def create_app(test_config=None):
     from .routes.gigs import gigs_bp
     from .routes.tracks import tracks_bp
     from .routes.sets import sets_bp
+    from .routes.batch import batch_bp
+    from .routes.export import export_bp
+    from .routes.events import events_bp
+    from .routes.sync import sync_bp
+    from .search import rebuild_command
+    from .stats import rebuild_command as stats_rebuild_command
+    from .sync import compact_command
+    from .duplicates import rebuild_command as fingerprint_rebuild_command
 
     app.register_blueprint(auth_bp, url_prefix="/api")
     app.register_blueprint(gigs_bp, url_prefix="/api")
     app.register_blueprint(tracks_bp, url_prefix="/api")
     app.register_blueprint(sets_bp, url_prefix="/api")
+    app.register_blueprint(batch_bp, url_prefix="/api")
+    app.register_blueprint(export_bp, url_prefix="/api")
+    app.register_blueprint(events_bp, url_prefix="/api")
+    app.register_blueprint(sync_bp, url_prefix="/api")
+
+    app.cli.add_command(rebuild_command)
+    app.cli.add_command(stats_rebuild_command)
+    app.cli.add_command(compact_command)
+    app.cli.add_command(fingerprint_rebuild_command)
 
     @app.get("/api/health")
     def health():
         return {"status": "ok"}
 
+    @app.get("/api/cache/stats")
+    def cache_stats():
+        return cache.stats() if cache else {"backend": None}
+
+    @app.get("/api/events/stats")
+    def events_stats():
+        return events.stats()
+
     return app
@@ -1,24 +1,48 @@
+from collections import namedtuple
 from functools import wraps
 from flask import session, jsonify
 from .models import User
 from . import db
 
+class Identity(namedtuple("Identity", "id username email")):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {"id": self.id, "username": self.username, "email": self.email}
+
+def login_user(user):
+    session["user_id"] = user.id
+    session["identity"] = [user.id, user.username, user.email]
+
+def logout_user():
+    session.pop("user_id", None)
+    session.pop("identity", None)
+
 def current_user():
     user_id = session.get("user_id")
     if not user_id:
         return None
-    return db.session.get(User, user_id)
+    payload = session.get("identity")
+    if payload and payload[0] == user_id:
+        return Identity(*payload)
+
+    user = db.session.get(User, user_id)
+    if not user:
+        logout_user()
+        return None
+    login_user(user)
+    return Identity(user.id, user.username, user.email)
 
 def login_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        if not session.get("user_id"):
+        if not current_user():
             return jsonify({"error": "Unauthorized"}), 401
         return fn(*args, **kwargs)
     return wrapper
 
-def get_owned(model, record_id, user_id):
-    obj = model.query.filter_by(id=record_id, user_id=user_id).first()
+def get_owned(model, record_id, user_id, options=()):
+    obj = model.query.options(*options).filter_by(id=record_id, user_id=user_id).first()
     if not obj:
         return None, ({"error": "Not found"}, 404)
     return obj, None
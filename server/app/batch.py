@@ -0,0 +1,13 @@
+from . import db
+
+
+def in_batch():
+    return db.session.info.get("batch", False)
+
+
+def commit():
+    """Commit the request's changes, or only flush them while POST /api/batch owns the transaction."""
+    if in_batch():
+        db.session.flush()
+    else:
+        db.session.commit()
@@ -0,0 +1,273 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, g, has_app_context, make_response, request, session
+from .changes import on_commit
+from .serialization import response_mimetype
+
+
+class MemoryCache:
+    """In-process LRU bounded by total entry size in bytes, with a TTL and tag invalidation."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._seq = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def sequence(self):
+        return self._seq
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags, seq=None):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if seq is not None and seq != self._seq:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tuple(tags), size)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            self._seq += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._drop(key)
+                        self.invalidations += 1
+
+    def _drop(self, key):
+        _, _, tags, size = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class SQLiteCache:
+    """Cache in a local SQLite file so every worker on the host shares entries and invalidations."""
+
+    def __init__(self, path, max_bytes=128 * 1024 * 1024, ttl=300):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, expires REAL NOT NULL, used REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS ix_cache_entries_used ON cache_entries (used);"
+                "CREATE TABLE IF NOT EXISTS cache_tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key));"
+                "CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);"
+                "CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL);"
+                "INSERT OR IGNORE INTO cache_meta (id, seq) VALUES (1, 0);"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def sequence(self):
+        return self._connect().execute("SELECT seq FROM cache_meta WHERE id = 1").fetchone()[0]
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value FROM cache_entries WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE cache_entries SET used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value, tags, seq=None):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if seq is not None and seq != conn.execute("SELECT seq FROM cache_meta WHERE id = 1").fetchone()[0]:
+                return
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires, used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + self.ttl, now),
+            )
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+            conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = conn.execute("SELECT key, size FROM cache_entries ORDER BY used LIMIT 1").fetchone()
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (oldest[0],))
+                conn.execute("DELETE FROM cache_tags WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        conn = self._connect()
+        tags = list(tags)
+        marks = ",".join("?" * len(tags))
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE cache_meta SET seq = seq + 1 WHERE id = 1")
+            if not tags:
+                return
+            keys = f"SELECT key FROM cache_tags WHERE tag IN ({marks})"
+            removed = conn.execute(f"DELETE FROM cache_entries WHERE key IN ({keys})", tags).rowcount
+            conn.execute(f"DELETE FROM cache_tags WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({marks}))", tags)
+            self.invalidations += max(removed, 0)
+
+    def stats(self):
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def init_cache(app):
+    backend = app.config.get("CACHE_BACKEND", "memory")
+    max_bytes = app.config.get("CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    ttl = app.config.get("CACHE_TTL", 300)
+    if backend == "memory":
+        cache = MemoryCache(max_bytes=max_bytes, ttl=ttl)
+    elif backend == "sqlite":
+        cache = SQLiteCache(app.config.get("CACHE_PATH", "cache.db"), max_bytes=max_bytes, ttl=ttl)
+    else:
+        cache = None
+    app.extensions["response_cache"] = cache
+    return cache
+
+
+def _cache():
+    return current_app.extensions.get("response_cache")
+
+
+def cached(tags, when=None, vary=None):
+    """Serve a view's 200 JSON response from the response cache.
+
+    The key is (user, endpoint, view args, sorted query args, representation); tags(user_id, view_kwargs, payload)
+    names the entities the payload depends on, and writes to those entities evict it. `vary()` adds anything
+    else the payload depends on (such as today's date) to the key. Responses read from a
+    lagging replica are not stored, since an eviction may already have happened for a write they don't show.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = _cache()
+            if cache is None or (when is not None and not when()):
+                return view(*args, **kwargs)
+
+            user_id = session["user_id"]
+            mimetype = response_mimetype()
+            key = json.dumps(
+                [user_id, request.endpoint, kwargs, sorted(request.args.items(multi=True)), mimetype, vary() if vary else None],
+                separators=(",", ":"),
+                sort_keys=True,
+            )
+            body = cache.get(key)
+            if body is not None:
+                response = Response(body, mimetype=mimetype)
+                response.vary.add("Accept")
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            seq = cache.sequence()
+            rv = view(*args, **kwargs)
+            response = make_response(rv)
+            payload = rv[0] if isinstance(rv, tuple) else rv
+            if g.get("read_from_replica"):
+                return response
+            if response.status_code == 200 and response.mimetype == mimetype and isinstance(payload, dict):
+                cache.set(key, response.get_data(), tags(user_id, kwargs, payload), seq=seq)
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def change_tags(change):
+    if change.entity == "set_item":
+        tags = [f"set:{change.set_id}", f"user:{change.user_id}:tracks"]
+        if change.values:
+            tags.append(f"track:{change.values['track_id']}")
+        return tags
+    kind = {"gig": "gigs", "track": "tracks", "set": "sets"}[change.entity]
+    tags = [f"user:{change.user_id}:{kind}"]
+    if change.entity in ("gig", "set") and change.op != "create":
+        tags.append(f"user:{change.user_id}:tracks")
+    if change.id is not None:
+        tags.append(f"{change.entity}:{change.id}")
+    return tags
+
+
+@on_commit
+def _invalidate(changes):
+    if not has_app_context():
+        return
+    cache = _cache()
+    if cache is None:
+        return
+    tags = set()
+    for change in changes:
+        tags.update(change_tags(change))
+    cache.invalidate(tags)
@@ -0,0 +1,70 @@
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from .models import Gig, Set, SetItem, Track
+
+Change = namedtuple("Change", "entity op id user_id set_id values")
+
+TRACKED = {Gig: "gig", Track: "track", Set: "set", SetItem: "set_item"}
+
+_commit_listeners = []
+_transaction_listeners = []
+
+
+def on_commit(fn):
+    _commit_listeners.append(fn)
+    return fn
+
+
+def on_record(fn):
+    _transaction_listeners.append(fn)
+    return fn
+
+
+def record(session, *changes):
+    session.info.setdefault("changes", []).extend(changes)
+    for listener in _transaction_listeners:
+        listener(session, changes)
+
+
+def _values(obj):
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _owner(session, obj):
+    if isinstance(obj, SetItem):
+        parent = session.identity_map.get(identity_key(Set, obj.set_id))
+        user_id = parent.user_id if parent is not None else session.query(Set.user_id).filter_by(id=obj.set_id).scalar()
+        return user_id, obj.set_id
+    if isinstance(obj, Set):
+        return obj.user_id, obj.id
+    return obj.user_id, None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    changes = []
+    for op, objects in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            entity = TRACKED.get(type(obj))
+            if entity is None or (op == "update" and not session.is_modified(obj, include_collections=False)):
+                continue
+            user_id, set_id = _owner(session, obj)
+            changes.append(Change(entity, op, obj.id, user_id, set_id, _values(obj)))
+    if changes:
+        record(session, *changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    changes = session.info.pop("changes", None)
+    if not changes:
+        return
+    for listener in _commit_listeners:
+        listener(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("changes", None)
@@ -0,0 +1,121 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func, select, update
+from . import db
+from .models import Track
+
+FINGERPRINT_LENGTH = 255
+FUZZY_THRESHOLD = 0.88
+FUZZY_MAX_BUCKET = 200
+
+_DASHES = re.compile(r"[‐-―−]")
+_MIX_LABEL = r"(?:original|original mix|extended|extended mix|radio edit|radio mix|clean|explicit|remaster(?:ed)?(?: \d{4})?)"
+_MIX_NOISE = re.compile(rf"[(\[]\s*{_MIX_LABEL}\s*[)\]]|\s+-\s+{_MIX_LABEL}\s*$")
+# An unbracketed credit only counts after other text, so "Ft. Lauderdale" and "Ft. Knox" stay whole.
+_FEATURING = re.compile(r"[(\[]\s*(?:feat|ft|featuring)\b\.?\s+[^)\]]*[)\]]?|(?<=\S)\s+(?:feat|ft|featuring)\b\.?\s+[^)\]]*")
+_REMIX = re.compile(r"\b(?:rmx|re-mix)\b")
+# Word separators only split between two names, so "X" and "Malcolm X" stay whole.
+_ARTIST_SPLIT = re.compile(r"\s*(?:&|,|/|\+)\s*|(?<=\S)\s+(?:and|x|vs\.?|with)\s+(?=\S)")
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _DASHES.sub("-", text).casefold()
+
+
+def _words(text):
+    return " ".join(_NON_WORD.sub(" ", text).replace("_", " ").split())
+
+
+def normalize_title(title):
+    title = _FEATURING.sub(" ", _MIX_NOISE.sub(" ", _fold(title)))
+    return _words(_REMIX.sub("remix", title))
+
+
+def normalize_artist(artist):
+    artist = _FEATURING.sub(" ", _fold(artist))
+    names = {_words(name) for name in _ARTIST_SPLIT.split(artist)}
+    return " ".join(sorted(name for name in names if name))
+
+
+def fingerprint(artist, title):
+    """Matching key for a track: case, accents, dashes, punctuation, featured artists and mix labels ignored."""
+    return f"{normalize_artist(artist)}|{normalize_title(title)}"[:FINGERPRINT_LENGTH]
+
+
+def _similar(a, b):
+    matcher = SequenceMatcher(None, a, b)
+    return matcher.real_quick_ratio() >= FUZZY_THRESHOLD and matcher.quick_ratio() >= FUZZY_THRESHOLD and matcher.ratio() >= FUZZY_THRESHOLD
+
+
+def find_duplicates(user_id):
+    """Fingerprints of the user's tracks that probably name the same song, as [(kind, [fingerprint, ...])].
+
+    Identical fingerprints come straight from the (user_id, fingerprint) index. The fuzzy pass then
+    compares titles only within one artist's bucket, and skips buckets above FUZZY_MAX_BUCKET titles,
+    so the work stays bounded however large the library is.
+    """
+    counts = (
+        db.session.query(Track.fingerprint, func.count(Track.id))
+        .filter(Track.user_id == user_id, Track.fingerprint.isnot(None))
+        .group_by(Track.fingerprint)
+        .all()
+    )
+    exact = {fp for fp, n in counts if n > 1}
+
+    by_artist = defaultdict(list)
+    for fp, _ in counts:
+        artist, _, title = fp.partition("|")
+        by_artist[artist].append(fp)
+
+    parent = {}
+
+    def find(fp):
+        while parent.get(fp, fp) != fp:
+            fp = parent[fp]
+        return fp
+
+    for fps in by_artist.values():
+        if len(fps) < 2 or len(fps) > FUZZY_MAX_BUCKET:
+            continue
+        titles = [fp.partition("|")[2] for fp in fps]
+        for i in range(len(fps)):
+            for j in range(i + 1, len(fps)):
+                if _similar(titles[i], titles[j]):
+                    parent[find(fps[j])] = find(fps[i])
+
+    fuzzy = defaultdict(list)
+    for fp in parent:
+        fuzzy[find(fp)].append(fp)
+    for root, members in fuzzy.items():
+        if root not in members:
+            members.append(root)
+
+    groups = [("fuzzy", sorted(members)) for members in fuzzy.values()]
+    grouped = {fp for _, members in groups for fp in members}
+    groups += [("exact", [fp]) for fp in sorted(exact - grouped)]
+    return groups
+
+
+def rebuild(connection):
+    rows = connection.execute(select(Track.id, Track.artist, Track.title)).all()
+    if rows:
+        connection.execute(
+            update(Track).where(Track.id == bindparam("tid")).values(fingerprint=bindparam("fp")),
+            [{"tid": tid, "fp": fingerprint(artist, title)} for tid, artist, title in rows],
+        )
+
+
+@click.command("fingerprint-rebuild")
+@with_appcontext
+def rebuild_command():
+    """Recompute the duplicate-detection fingerprint of every track."""
+    rebuild(db.session.connection())
+    db.session.commit()
+    click.echo("Track fingerprints rebuilt.")
@@ -0,0 +1,99 @@
+import time
+from flask import current_app, g, has_request_context, request
+from flask import session as client_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def _is_file_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(url, config):
+    """SQLAlchemy engine options for DB_PROFILE=tuned; the default profile keeps SQLAlchemy's defaults."""
+    if config.get("DB_PROFILE") != "tuned":
+        return {}
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        return {
+            "pool_size": config["DB_POOL_SIZE"],
+            "max_overflow": config["DB_MAX_OVERFLOW"],
+            "pool_timeout": config["DB_POOL_TIMEOUT"],
+            "pool_recycle": config["DB_POOL_RECYCLE"],
+            "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        }
+    if _is_file_sqlite(url):
+        return {"connect_args": {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}}
+    return {}
+
+
+def configure_engines(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS from the profile before db.init_app()."""
+    config = app.config
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(config["SQLALCHEMY_DATABASE_URI"], config),
+        **config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
+
+def init_replica(app):
+    """Engine for DATABASE_REPLICA_URL, kept out of SQLALCHEMY_BINDS so models never create tables on it."""
+    url = app.config.get("DATABASE_REPLICA_URL")
+    replica = create_engine(url, **engine_options(url, app.config)) if url else None
+    app.extensions["db_replica"] = replica
+    return replica
+
+
+def install_pragmas(app, engines):
+    """Per-connection SQLite pragmas: WAL so readers never wait on the writer, plus sync/mmap/busy settings."""
+    config = app.config
+    if config.get("DB_PROFILE") != "tuned":
+        return
+    pragmas = (
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+    )
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    for engine in engines:
+        if _is_file_sqlite(engine.url):
+            event.listen(engine, "connect", on_connect)
+
+
+def _reads_from_replica():
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    wrote_at = client_session.get("db_write_at")
+    return not wrote_at or time.time() - wrote_at >= current_app.config["REPLICA_STICKY_SECONDS"]
+
+
+class RoutingSession(Session):
+    """Sends reads made by GET/HEAD handlers to the "replica" bind when one is configured.
+
+    A client that has just written keeps reading from the primary for REPLICA_STICKY_SECONDS,
+    so it sees its own changes despite replication lag.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = current_app.extensions.get("db_replica") if bind is None and not self._flushing else None
+        if replica is not None and _reads_from_replica():
+            g.read_from_replica = True
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    if has_request_context() and current_app.config.get("DATABASE_REPLICA_URL"):
+        client_session["db_write_at"] = time.time()
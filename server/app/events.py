@@ -0,0 +1,117 @@
+import threading
+from collections import deque
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from . import db
+from .changes import on_commit
+from .models import User
+
+
+class Subscription:
+    """One connected client: a bounded queue the stream drains, closed if the client falls behind."""
+
+    def __init__(self, user_id, maxlen):
+        self.user_id = user_id
+        self.maxlen = maxlen
+        self.overflowed = False
+        self._queue = deque()
+        self._ready = threading.Condition()
+
+    def put(self, event):
+        with self._ready:
+            if self.overflowed:
+                return
+            if len(self._queue) >= self.maxlen:
+                self.overflowed = True
+                self._queue.clear()
+            else:
+                self._queue.append(event)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """Next event, or None once `timeout` passes with nothing to send (time for a heartbeat)."""
+        with self._ready:
+            if not self._queue and not self.overflowed:
+                self._ready.wait(timeout)
+            return self._queue.popleft() if self._queue else None
+
+
+class EventBroker:
+    """In-process fan-out of committed changes to each user's open event streams."""
+
+    def __init__(self, queue_size=256, max_per_user=10):
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self.published = self.dropped = 0
+
+    def subscribe(self, user_id):
+        with self._lock:
+            subs = self._subscribers.setdefault(user_id, set())
+            if len(subs) >= self.max_per_user:
+                return None
+            sub = Subscription(user_id, self.queue_size)
+            subs.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def listening(self, user_ids):
+        with self._lock:
+            return {user_id for user_id in user_ids if user_id in self._subscribers}
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            sub.put(event)
+            if sub.overflowed:
+                self.dropped += 1
+                self.unsubscribe(sub)
+        self.published += 1
+
+    def stats(self):
+        with self._lock:
+            connections = sum(len(subs) for subs in self._subscribers.values())
+            return {"users": len(self._subscribers), "connections": connections, "published": self.published, "dropped": self.dropped}
+
+
+def init_events(app):
+    broker = EventBroker(
+        queue_size=app.config.get("EVENTS_QUEUE_SIZE", 256),
+        max_per_user=app.config.get("EVENTS_MAX_PER_USER", 10),
+    )
+    app.extensions["event_broker"] = broker
+    return broker
+
+
+def event_broker():
+    return current_app.extensions["event_broker"]
+
+
+@on_commit
+def _publish(changes):
+    if not has_app_context() or "event_broker" not in current_app.extensions:
+        return
+    broker = current_app.extensions["event_broker"]
+    user_ids = broker.listening({c.user_id for c in changes if c.user_id is not None})
+    if not user_ids:
+        return
+    with db.engine.connect() as connection:
+        versions = dict(connection.execute(select(User.id, User.data_version).where(User.id.in_(user_ids))).all())
+    for change in changes:
+        if change.user_id in user_ids:
+            broker.publish(change.user_id, {
+                "entity": change.entity,
+                "op": change.op,
+                "id": change.id,
+                "set_id": change.set_id,
+                "version": versions.get(change.user_id),
+            })
@@ -0,0 +1,107 @@
+import re
+import numpy as np
+
+_CAMELOT = re.compile(r"^(\d{1,2})\s*([ab])$", re.IGNORECASE)
+_NOTE = re.compile(r"^([a-g])\s*([#b♯♭]?)\s*(m|min|minor|maj|major)?$", re.IGNORECASE)
+_PITCH = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+ENERGY_WORDS = {
+    "chill": 2,
+    "low": 2,
+    "warmup": 3,
+    "warm": 3,
+    "opener": 3,
+    "cooldown": 4,
+    "groove": 5,
+    "mid": 5,
+    "medium": 5,
+    "build": 6,
+    "closer": 6,
+    "high": 8,
+    "peak": 9,
+}
+
+WEIGHTS = {"key": 0.45, "bpm": 0.35, "energy": 0.2}
+BPM_TOLERANCE = 0.08
+HALF_TIME_FACTOR = 0.8
+
+
+def parse_camelot(value):
+    """Return (number 1-12, 0 for A / 1 for B), or (0, -1) when the key is unknown."""
+    value = (value or "").strip()
+    m = _CAMELOT.match(value)
+    if m and 1 <= int(m.group(1)) <= 12:
+        return int(m.group(1)), 0 if m.group(2).lower() == "a" else 1
+
+    m = _NOTE.match(value)
+    if not m:
+        return 0, -1
+    pc = _PITCH[m.group(1).lower()]
+    if m.group(2) in ("#", "♯"):
+        pc += 1
+    elif m.group(2) in ("b", "♭"):
+        pc -= 1
+    minor = (m.group(3) or "").lower() in ("m", "min", "minor")
+    if minor:
+        pc += 3
+    return (pc % 12 * 7 + 7) % 12 + 1, 0 if minor else 1
+
+
+def parse_energy(value):
+    value = (value or "").strip().lower()
+    if not value:
+        return np.nan
+    try:
+        return float(min(max(float(value), 1), 10))
+    except ValueError:
+        return float(ENERGY_WORDS.get(value, np.nan))
+
+
+def features(rows):
+    """Feature arrays for (bpm, musical_key, energy) rows."""
+    rows = list(rows)
+    keys = [parse_camelot(key) for _, key, _ in rows]
+    return {
+        "bpm": np.array([np.nan if bpm is None else bpm for bpm, _, _ in rows], dtype=np.float64),
+        "num": np.array([k[0] for k in keys], dtype=np.int8),
+        "letter": np.array([k[1] for k in keys], dtype=np.int8),
+        "energy": np.array([parse_energy(energy) for _, _, energy in rows], dtype=np.float64),
+    }
+
+
+def key_score(num_a, letter_a, num_b, letter_b):
+    diff = (np.asarray(num_b, dtype=np.int16) - num_a) % 12
+    same = letter_a == letter_b
+    score = np.select(
+        [same & (diff == 0), same & ((diff == 1) | (diff == 11)), ~same & (diff == 0), same & ((diff == 2) | (diff == 10))],
+        [1.0, 0.9, 0.8, 0.5],
+        default=0.1,
+    )
+    return np.where((num_a == 0) | (np.asarray(num_b) == 0), 0.5, score)
+
+
+def bpm_score(bpm_a, bpm_b):
+    bpm_b = np.asarray(bpm_b, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        window = bpm_a * BPM_TOLERANCE
+        direct = np.clip(1 - np.abs(bpm_b - bpm_a) / window, 0, 1)
+        halved_or_doubled = np.minimum(np.abs(bpm_b * 2 - bpm_a), np.abs(bpm_b / 2 - bpm_a))
+        score = np.maximum(direct, HALF_TIME_FACTOR * np.clip(1 - halved_or_doubled / window, 0, 1))
+    return np.where(np.isnan(score), 0.5, score)
+
+
+def energy_score(energy_a, energy_b):
+    step = np.asarray(energy_b, dtype=np.float64) - energy_a
+    score = np.clip(1 - np.abs(step - 0.5) / 4, 0, 1)
+    return np.where(np.isnan(score), 0.5, score)
+
+
+def transition_scores(src, dst):
+    """Score moving from src to dst; both are feature dicts and broadcast against each other."""
+    parts = {
+        "key": key_score(src["num"], src["letter"], dst["num"], dst["letter"]),
+        "bpm": bpm_score(src["bpm"], dst["bpm"]),
+        "energy": energy_score(src["energy"], dst["energy"]),
+    }
+    total = sum(WEIGHTS[name] * part for name, part in parts.items())
+    return total, parts
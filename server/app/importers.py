@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+
+CSV_ALIASES = {"key": "musical_key", "name": "title"}
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row in reader:
+        data = {}
+        for name, value in row.items():
+            if name is None:
+                continue
+            name = name.strip().lower()
+            data[CSV_ALIASES.get(name, name)] = value if value != "" else None
+        yield reader.line_num, data, None
+
+
+def iter_ndjson(stream):
+    for line_num, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8"), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_num, None, "invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield line_num, None, "row must be a JSON object"
+            continue
+        yield line_num, data, None
+
+
+def _rekordbox_bpm(value):
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return value
+
+
+def iter_rekordbox(stream):
+    row_num = 0
+    for _, el in ET.iterparse(stream, events=("end",)):
+        if el.tag != "TRACK" or "Name" not in el.attrib:
+            continue
+        row_num += 1
+        attrs = el.attrib
+        yield row_num, {
+            "title": attrs.get("Name"),
+            "artist": attrs.get("Artist"),
+            "bpm": _rekordbox_bpm(attrs["AverageBpm"]) if attrs.get("AverageBpm") else None,
+            "musical_key": attrs.get("Tonality"),
+            "notes": attrs.get("Comments") or None,
+        }, None
+        el.clear()
+
+
+IMPORTERS = {"csv": iter_csv, "ndjson": iter_ndjson, "xml": iter_rekordbox}
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/xml": "xml",
+    "text/xml": "xml",
+}
+
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson", "xml": "xml"}
+
+
+def detect_format(explicit, content_type, filename):
+    if explicit:
+        return explicit.lower()
+    if filename and "." in filename:
+        return EXTENSIONS.get(filename.rsplit(".", 1)[1].lower())
+    return CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
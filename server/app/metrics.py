@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import deque
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+SERIES = {
+    "wall_seconds": ("setlist_request_seconds", "Request wall time in seconds."),
+    "db_seconds": ("setlist_request_db_seconds", "Time spent in database queries per request, in seconds."),
+    "queries": ("setlist_request_queries", "Database queries issued per request."),
+    "response_bytes": ("setlist_response_bytes", "Response body size in bytes."),
+}
+
+
+class RequestMetrics:
+    def __init__(self, window=2048):
+        self.window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, **values):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    name: {"count": 0, "sum": 0.0, "samples": deque(maxlen=self.window)} for name in SERIES
+                }
+            for name, value in values.items():
+                series = stats[name]
+                series["count"] += 1
+                series["sum"] += value
+                series["samples"].append(value)
+
+    def render(self):
+        with self._lock:
+            snapshot = {
+                endpoint: {name: (s["count"], s["sum"], sorted(s["samples"])) for name, s in stats.items()}
+                for endpoint, stats in self._endpoints.items()
+            }
+
+        lines = []
+        for name, (metric, help_text) in SERIES.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for endpoint, stats in sorted(snapshot.items()):
+                count, total, samples = stats[name]
+                label = f'endpoint="{endpoint}"'
+                for q in QUANTILES:
+                    value = samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0
+                    lines.append(f'{metric}{{{label},quantile="{q}"}} {value:g}')
+                lines.append(f"{metric}_sum{{{label}}} {total:g}")
+                lines.append(f"{metric}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def init_metrics(app, engine):
+    metrics = RequestMetrics(window=app.config.get("METRICS_WINDOW", 2048))
+    app.extensions["metrics"] = metrics
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        if has_request_context() and "metrics_start" in g:
+            g.metrics_queries += 1
+            g.metrics_db_seconds += elapsed
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    @app.after_request
+    def _record_request(response):
+        if "metrics_start" not in g:
+            return response
+        wall = time.perf_counter() - g.metrics_start
+        db_seconds = g.metrics_db_seconds
+        size = 0 if response.is_streamed else response.calculate_content_length() or 0
+        metrics.observe(
+            request.endpoint or "unmatched",
+            wall_seconds=wall,
+            db_seconds=db_seconds,
+            queries=g.metrics_queries,
+            response_bytes=size,
+        )
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_seconds * 1000:.2f};desc="{g.metrics_queries} queries", '
+            f"app;dur={(wall - db_seconds) * 1000:.2f}"
+        )
+        return response
+
+    @app.get("/api/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
@@ -2,6 +2,15 @@ from datetime import date
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
 
+
+def dump_fields(obj, fields):
+    data = {}
+    for name in fields:
+        value = getattr(obj, name)
+        data[name] = value.isoformat() if isinstance(value, date) else value
+    return data
+
+
 class User(db.Model):
     __tablename__ = "users"
 
@@ -9,6 +18,7 @@ class User(db.Model):
     username = db.Column(db.String(80), nullable=False)
     email = db.Column(db.String(255), nullable=False, unique=True, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     gigs = db.relationship("Gig", back_populates="user", cascade="all, delete-orphan")
     sets = db.relationship("Set", back_populates="user", cascade="all, delete-orphan")
@@ -34,18 +44,17 @@ class Gig(db.Model):
     gig_date = db.Column(db.Date)
     notes = db.Column(db.Text)
 
+    FIELDS = ("id", "user_id", "title", "venue", "gig_date", "notes")
+
     user = db.relationship("User", back_populates="gigs")
     sets = db.relationship("Set", back_populates="gig")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "title": self.title,
-            "venue": self.venue,
-            "gig_date": self.gig_date.isoformat() if self.gig_date else None,
-            "notes": self.notes,
-        }
+    __table_args__ = (
+        db.Index("ix_gigs_user_date", "user_id", "gig_date", "id"),
+    )
+
+    def to_dict(self, fields=None):
+        return dump_fields(self, fields or self.FIELDS)
 
 
 class Set(db.Model):
@@ -56,21 +65,19 @@ class Set(db.Model):
     gig_id = db.Column(db.Integer, db.ForeignKey("gigs.id"))
     name = db.Column(db.String(200), nullable=False)
     notes = db.Column(db.Text)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    FIELDS = ("id", "user_id", "gig_id", "name", "notes")
 
     user = db.relationship("User", back_populates="sets")
     gig = db.relationship("Gig", back_populates="sets")
     items = db.relationship("SetItem", back_populates="set", cascade="all, delete-orphan", order_by="SetItem.position")
 
-    def to_dict(self, include_items=False):
-        data = {
-            "id": self.id,
-            "user_id": self.user_id,
-            "gig_id": self.gig_id,
-            "name": self.name,
-            "notes": self.notes,
-        }
-        if include_items:
-            data["items"] = [i.to_dict() for i in self.items]
+    def to_dict(self, include_items=False, fields=None, item_fields=None, track_fields=None):
+        fields = fields or (*self.FIELDS, "items")
+        data = dump_fields(self, [f for f in fields if f != "items"])
+        if include_items and "items" in fields:
+            data["items"] = [i.to_dict(item_fields, track_fields) for i in self.items]
         return data
 
 
@@ -85,21 +92,32 @@ class Track(db.Model):
     musical_key = db.Column(db.String(30))
     energy = db.Column(db.String(30))
     notes = db.Column(db.Text)
+    play_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    set_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_played = db.Column(db.Date)
+    fingerprint = db.Column(db.String(255))
+
+    FIELDS = (
+        "id", "user_id", "title", "artist", "bpm", "musical_key", "energy", "notes",
+        "play_count", "set_count", "last_played",
+    )
 
     user = db.relationship("User", back_populates="tracks")
     set_items = db.relationship("SetItem", back_populates="track")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "title": self.title,
-            "artist": self.artist,
-            "bpm": self.bpm,
-            "musical_key": self.musical_key,
-            "energy": self.energy,
-            "notes": self.notes,
-        }
+    __table_args__ = (
+        db.Index("ix_tracks_user_title", "user_id", "title", "id"),
+        db.Index("ix_tracks_user_artist", "user_id", "artist", "id"),
+        db.Index("ix_tracks_user_play_count", "user_id", "play_count", "id"),
+        db.Index("ix_tracks_user_set_count", "user_id", "set_count", "id"),
+        db.Index("ix_tracks_user_fingerprint", "user_id", "fingerprint"),
+        db.Index("ix_tracks_user_bpm", "user_id", "bpm"),
+        db.Index("ix_tracks_user_musical_key", "user_id", "musical_key"),
+        db.Index("ix_tracks_user_energy", "user_id", "energy"),
+    )
+
+    def to_dict(self, fields=None):
+        return dump_fields(self, fields or self.FIELDS)
 
 
 class SetItem(db.Model):
@@ -111,6 +129,8 @@ class SetItem(db.Model):
     position = db.Column(db.Integer, nullable=False, default=0)
     notes = db.Column(db.Text)
 
+    FIELDS = ("id", "set_id", "track_id", "position", "notes", "track")
+
     set = db.relationship("Set", back_populates="items")
     track = db.relationship("Track", back_populates="set_items")
 
@@ -118,12 +138,26 @@ class SetItem(db.Model):
         db.UniqueConstraint("set_id", "position", name="uq_set_position"),
     )
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "set_id": self.set_id,
-            "track_id": self.track_id,
-            "position": self.position,
-            "notes": self.notes,
-            "track": self.track.to_dict() if self.track else None,
-        }
+    def to_dict(self, fields=None, track_fields=None):
+        fields = fields or self.FIELDS
+        data = dump_fields(self, [f for f in fields if f != "track"])
+        if "track" in fields:
+            data["track"] = self.track.to_dict(track_fields) if self.track else None
+        return data
+
+
+class SyncLog(db.Model):
+    """One row per write to a gig, track, set or set item, ordered per user by the data version it produced."""
+
+    __tablename__ = "sync_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_sync_log_user_version", "user_id", "version", "id"),
+    )
@@ -0,0 +1,136 @@
+import time
+from .harmony import features, transition_scores
+
+
+def cost_matrix(rows):
+    """Pairwise transition costs (0 = perfect mix) for (bpm, musical_key, energy) rows."""
+    f = features(rows)
+    src = {name: values[:, None] for name, values in f.items()}
+    total, _ = transition_scores(src, f)
+    return (1 - total).tolist()
+
+
+def path_cost(costs, order):
+    return sum(costs[a][b] for a, b in zip(order, order[1:]))
+
+
+def _greedy(costs, start, end):
+    order = [start]
+    remaining = set(range(len(costs))) - {start, end}
+    while remaining:
+        row = costs[order[-1]]
+        nxt = min(remaining, key=row.__getitem__)
+        order.append(nxt)
+        remaining.discard(nxt)
+    if end is not None:
+        order.append(end)
+    return order
+
+
+def _prefix_costs(costs, order):
+    forward = [0.0] * len(order)
+    backward = [0.0] * len(order)
+    for k in range(1, len(order)):
+        forward[k] = forward[k - 1] + costs[order[k - 1]][order[k]]
+        backward[k] = backward[k - 1] + costs[order[k]][order[k - 1]]
+    return forward, backward
+
+
+def _two_opt(costs, order, lo, hi, deadline):
+    """Reverse order[i..j] whenever it lowers the cost. Costs are asymmetric, so the reversed
+    segment is priced with backward prefix sums to keep each check O(1)."""
+    n = len(order)
+    improved = False
+    forward, backward = _prefix_costs(costs, order)
+    for i in range(lo, hi):
+        if time.perf_counter() > deadline:
+            break
+        for j in range(i + 1, hi + 1):
+            old = forward[j] - forward[i]
+            new = backward[j] - backward[i]
+            if i > 0:
+                old += costs[order[i - 1]][order[i]]
+                new += costs[order[i - 1]][order[j]]
+            if j + 1 < n:
+                old += costs[order[j]][order[j + 1]]
+                new += costs[order[i]][order[j + 1]]
+            if new < old - 1e-9:
+                order[i : j + 1] = order[i : j + 1][::-1]
+                forward, backward = _prefix_costs(costs, order)
+                improved = True
+    return improved
+
+
+def _or_opt(costs, order, lo, hi, deadline):
+    """Move a run of 1-3 items to the cheapest other gap inside the movable range."""
+
+    def link(a, b):
+        return costs[a][b] if a is not None and b is not None else 0.0
+
+    n = len(order)
+    improved = False
+    for length in (1, 2, 3):
+        i = lo
+        while i + length - 1 <= hi:
+            if time.perf_counter() > deadline:
+                return improved
+            j = i + length - 1
+            segment = order[i : j + 1]
+            prev = order[i - 1] if i > 0 else None
+            nxt = order[j + 1] if j + 1 < n else None
+            gain = link(prev, segment[0]) + link(segment[-1], nxt) - link(prev, nxt)
+            rest = order[:i] + order[j + 1 :]
+
+            best_p, best_delta = None, -1e-9
+            for p in range(lo, hi - length + 2):
+                if p == i:
+                    continue
+                a = rest[p - 1] if p > 0 else None
+                b = rest[p] if p < len(rest) else None
+                delta = link(a, segment[0]) + link(segment[-1], b) - link(a, b) - gain
+                if delta < best_delta:
+                    best_p, best_delta = p, delta
+            if best_p is not None:
+                order[:] = rest[:best_p] + segment + rest[best_p:]
+                improved = True
+            i += 1
+    return improved
+
+
+def optimize_order(costs, budget_ms=200, first=None, last=None):
+    """Anytime ordering of a cost matrix into a low-cost path.
+
+    Builds greedy nearest-neighbour paths from as many starts as the first half of the budget
+    allows, then applies 2-opt and or-opt moves to the best one until neither improves it or the
+    budget runs out. first/last pin node indexes to the ends of the path.
+    """
+    n = len(costs)
+    if n < 3:
+        order = list(range(n))
+        if (first is not None and order[0] != first) or (last is not None and order[-1] != last):
+            order.reverse()
+        return order, path_cost(costs, order)
+
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000
+    construction_deadline = started + budget_ms / 2000
+    starts = [first] if first is not None else [node for node in range(n) if node != last]
+
+    best, best_cost = None, float("inf")
+    for start in starts:
+        order = _greedy(costs, start, last)
+        cost = path_cost(costs, order)
+        if cost < best_cost:
+            best, best_cost = order, cost
+        if time.perf_counter() > construction_deadline:
+            break
+
+    lo = 1 if first is not None else 0
+    hi = n - 2 if last is not None else n - 1
+    order = list(best)
+    while time.perf_counter() < deadline:
+        moved = _two_opt(costs, order, lo, hi, deadline)
+        moved = _or_opt(costs, order, lo, hi, deadline) or moved
+        if not moved:
+            break
+    return order, path_cost(costs, order)
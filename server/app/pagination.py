@@ -0,0 +1,61 @@
+import base64
+import binascii
+import json
+import time
+from collections import OrderedDict
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort, values):
+    raw = json.dumps([sort, *values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, sort, size):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise InvalidCursor(token)
+    if not isinstance(data, list) or len(data) != size + 1 or data[0] != sort:
+        raise InvalidCursor(token)
+    if not all(value is None or isinstance(value, (str, int, float)) for value in data[1:]):
+        raise InvalidCursor(token)
+    return data[1:]
+
+
+def keyset(query, columns, descending, after=None):
+    if after is not None:
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple_(*after) if len(columns) > 1 else after[0]
+        query = query.filter(key < bound if descending else key > bound)
+    return query.order_by(*(c.desc() if descending else c.asc() for c in columns))
+
+
+def fetch_page(query, limit):
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        hit = self._data.get(key)
+        if hit is None or hit[0] < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return hit[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
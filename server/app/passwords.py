@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded thread pool (hashlib releases the GIL while hashing).
+
+    At most workers + queue_size hashes are admitted at once; callers beyond that wait up to
+    `timeout` seconds for a slot and then get HasherBusy instead of piling up behind the pool.
+    """
+
+    def __init__(self, method="scrypt", salt_length=16, workers=4, queue_size=32, timeout=5.0):
+        self.method = method
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._prefix = generate_password_hash("", method, salt_length).split("$", 1)[0]
+        self._dummy = generate_password_hash("dummy-password", method, salt_length)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash or self._dummy, password) and pwhash is not None
+
+    def needs_rehash(self, pwhash):
+        prefix, _, rest = pwhash.partition("$")
+        return prefix != self._prefix or len(rest.partition("$")[0]) != self.salt_length
+
+
+class AttemptLimiter:
+    """Sliding-window failure counter per key (account or client address)."""
+
+    def __init__(self, max_failures, window, max_keys=100_000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures = OrderedDict()
+
+    def retry_after(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(key)
+            if not failures:
+                return 0
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+            if len(failures) < self.max_failures:
+                return 0
+            return int(failures[0] + self.window - now) + 1
+
+    def fail(self, key):
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None:
+                failures = self._failures[key] = deque(maxlen=self.max_failures)
+            self._failures.move_to_end(key)
+            failures.append(time.monotonic())
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+def init_passwords(app):
+    hasher = PasswordHasher(
+        method=app.config.get("PASSWORD_HASH_METHOD", "scrypt"),
+        salt_length=app.config.get("PASSWORD_SALT_LENGTH", 16),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", 4),
+        queue_size=app.config.get("PASSWORD_HASH_QUEUE", 32),
+    )
+    window = app.config.get("LOGIN_FAILURE_WINDOW", 300)
+    app.extensions["password_hasher"] = hasher
+    app.extensions["login_limiters"] = {
+        "account": AttemptLimiter(app.config.get("LOGIN_MAX_FAILURES_PER_ACCOUNT", 5), window),
+        "ip": AttemptLimiter(app.config.get("LOGIN_MAX_FAILURES_PER_IP", 50), window),
+    }
+    return hasher
+
+
+def password_hasher():
+    return current_app.extensions["password_hasher"]
+
+
+def login_limiters():
+    return current_app.extensions["login_limiters"]
@@ -1,11 +1,16 @@
-from flask import Blueprint, request, session, jsonify
+from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import IntegrityError
 from .. import db
 from ..models import User
-from ..auth_utils import current_user, login_required
+from ..auth_utils import current_user, login_required, login_user, logout_user
+from ..passwords import HasherBusy, login_limiters, password_hasher
 
 auth_bp = Blueprint("auth", __name__)
 
+@auth_bp.errorhandler(HasherBusy)
+def hasher_busy(err):
+    return {"error": "server busy, try again shortly"}, 503, {"Retry-After": "1"}
+
 @auth_bp.post("/signup")
 def signup():
     data = request.get_json() or {}
@@ -19,7 +24,7 @@ def signup():
         return {"error": "password must be at least 6 characters"}, 400
 
     user = User(username=username, email=email)
-    user.set_password(password)
+    user.password_hash = password_hasher().hash(password)
 
     db.session.add(user)
     try:
@@ -28,7 +33,7 @@ def signup():
         db.session.rollback()
         return {"error": "email already in use"}, 409
 
-    session["user_id"] = user.id
+    login_user(user)
     return user.to_dict(), 201
 
 @auth_bp.post("/login")
@@ -40,16 +45,32 @@ def login():
     if not email or not password:
         return {"error": "email and password are required"}, 400
 
+    limiters = login_limiters()
+    address = request.remote_addr or "unknown"
+    # Account failures are counted per client address, so guessing from elsewhere can't lock the owner out.
+    keys = {"account": f"{email}|{address}", "ip": address}
+    retry_after = max(limiters[name].retry_after(key) for name, key in keys.items())
+    if retry_after:
+        return {"error": "too many failed attempts, try again later"}, 429, {"Retry-After": str(retry_after)}
+
+    hasher = password_hasher()
     user = User.query.filter_by(email=email).first()
-    if not user or not user.check_password(password):
+    if not hasher.verify(user.password_hash if user else None, password):
+        for name, key in keys.items():
+            limiters[name].fail(key)
         return {"error": "invalid credentials"}, 401
 
-    session["user_id"] = user.id
+    limiters["account"].reset(keys["account"])
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = hasher.hash(password)
+        db.session.commit()
+
+    login_user(user)
     return user.to_dict(), 200
 
 @auth_bp.delete("/logout")
 def logout():
-    session.pop("user_id", None)
+    logout_user()
     return {}, 204
 
 @auth_bp.get("/me")
@@ -0,0 +1,123 @@
+import re
+from flask import Blueprint, current_app, request, session
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+from .. import db
+from ..auth_utils import login_required
+
+batch_bp = Blueprint("batch", __name__)
+
+BATCH_BLUEPRINTS = {"gigs", "tracks", "sets"}
+BATCH_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+REFERENCE = re.compile(r"\$([A-Za-z_][\w-]*)((?:\.\w+)+)")
+
+def _lookup(refs, label, path):
+    if label not in refs:
+        raise LookupError(f"${label} is not an earlier operation's ref")
+    value = refs[label]
+    for part in path[1:].split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            raise LookupError(f"${label}{path} does not exist")
+    return value
+
+def _resolve(value, refs):
+    """Replace "$ref.field" strings in a body with values from earlier results, keeping their types."""
+    if isinstance(value, str):
+        match = REFERENCE.fullmatch(value)
+        return _lookup(refs, *match.groups()) if match else value
+    if isinstance(value, dict):
+        return {k: _resolve(v, refs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, refs) for v in value]
+    return value
+
+def _validate(operations):
+    limit = current_app.config.get("BATCH_MAX_OPERATIONS", 100)
+    if not isinstance(operations, list) or not operations:
+        return "operations must be a non-empty list"
+    if len(operations) > limit:
+        return f"at most {limit} operations per batch"
+    seen = set()
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            return f"operation {index} must be an object"
+        if str(op.get("method", "")).upper() not in BATCH_METHODS:
+            return f"operation {index}: method must be one of {', '.join(sorted(BATCH_METHODS))}"
+        if not isinstance(op.get("path"), str) or not op["path"].startswith("/"):
+            return f"operation {index}: path must start with /"
+        ref = op.get("ref")
+        if ref is not None:
+            if not isinstance(ref, str) or not REFERENCE.fullmatch(f"${ref}.id"):
+                return f"operation {index}: ref must be a simple name"
+            if ref in seen:
+                return f"operation {index}: duplicate ref {ref}"
+            seen.add(ref)
+    return None
+
+def _dispatch(method, path, body):
+    """Run one sub-operation through the normal view in the caller's session; returns (status, payload)."""
+    ctx = current_app.test_request_context(
+        f"/api{path}",
+        method=method,
+        json=body,
+        environ_base={"REMOTE_ADDR": request.remote_addr},
+    )
+    ctx.session = session._get_current_object()
+    with ctx:
+        if ctx.request.routing_exception is None and ctx.request.blueprint not in BATCH_BLUEPRINTS:
+            return 400, {"error": "operation is not allowed in a batch"}
+        try:
+            response = current_app.make_response(current_app.dispatch_request())
+        except HTTPException as exc:
+            return exc.code, {"error": exc.description}
+        except IntegrityError:
+            return 409, {"error": "operation conflicts with existing data"}
+        return response.status_code, response.get_json(silent=True)
+
+@batch_bp.post("/batch")
+@login_required
+def run_batch():
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    error = _validate(operations)
+    if error:
+        return {"error": error}, 400
+
+    results = []
+    refs = {}
+    db.session.info["batch"] = True
+    try:
+        for index, op in enumerate(operations):
+            try:
+                path = REFERENCE.sub(lambda m: str(_lookup(refs, *m.groups())), op["path"])
+                body = _resolve(op.get("body"), refs)
+            except LookupError as exc:
+                status, payload = 400, {"error": str(exc)}
+            else:
+                status, payload = _dispatch(op["method"].upper(), path, body)
+
+            result = {"index": index, "status": status, "body": payload}
+            if op.get("ref") is not None:
+                result["ref"] = op["ref"]
+                refs[op["ref"]] = payload
+            results.append(result)
+
+            if status >= 400:
+                db.session.rollback()
+                return {
+                    "error": f"operation {index} failed; no changes were saved",
+                    "failed": index,
+                    "results": results,
+                }, status
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop("batch", None)
+
+    return {"results": results}, 200
@@ -0,0 +1,43 @@
+import json
+from flask import Blueprint, Response, current_app
+from ..auth_utils import login_required, current_user
+from ..events import event_broker
+from ..versioning import user_version
+
+events_bp = Blueprint("events", __name__)
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+@events_bp.get("/events")
+@login_required
+def stream_events():
+    user = current_user()
+    broker = event_broker()
+    sub = broker.subscribe(user.id)
+    if sub is None:
+        return {"error": "too many open event streams"}, 429
+    heartbeat = current_app.config.get("EVENTS_HEARTBEAT", 15)
+    version = user_version(user.id)
+
+    def stream():
+        try:
+            yield "retry: 3000\n" + _sse("hello", {"version": version}, version)
+            while True:
+                event = sub.get(heartbeat)
+                if event is not None:
+                    yield _sse("change", event, event["version"])
+                elif sub.overflowed:
+                    yield _sse("resync", {"reason": "client fell behind; refetch and reconnect"})
+                    return
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.call_on_close(lambda: broker.unsubscribe(sub))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from flask import Blueprint, Response, request
+from sqlalchemy import select
+from .. import db
+from ..auth_utils import login_required, current_user
+from ..models import Gig, Set, SetItem, Track
+
+export_bp = Blueprint("export", __name__)
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORTS = {
+    "tracks": ("track", (Track.id, Track.title, Track.artist, Track.bpm, Track.musical_key, Track.energy,
+                         Track.notes, Track.play_count, Track.set_count, Track.last_played)),
+    "gigs": ("gig", (Gig.id, Gig.title, Gig.venue, Gig.gig_date, Gig.notes)),
+    "sets": ("set", (Set.id, Set.gig_id, Set.name, Set.notes)),
+    "items": ("set_item", (SetItem.id, SetItem.set_id, SetItem.track_id, SetItem.position, SetItem.notes)),
+}
+
+def _statement(name, user_id):
+    _, columns = EXPORTS[name]
+    model = columns[0].class_
+    stmt = select(*columns)
+    if model is SetItem:
+        stmt = stmt.join(Set, SetItem.set_id == Set.id).where(Set.user_id == user_id)
+    else:
+        stmt = stmt.where(model.user_id == user_id)
+    return stmt.order_by(columns[0]).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def _value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+def _snapshot():
+    """Open a connection whose reads all see the database as of one moment."""
+    connection = db.engine.connect()
+    if connection.dialect.name == "postgresql":
+        connection = connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        connection.begin()
+    elif connection.dialect.name == "sqlite":
+        connection.begin()
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN")
+    else:
+        connection.begin()
+    return connection
+
+def _ndjson(rows):
+    for kind, keys, row in rows:
+        yield json.dumps({"type": kind, **{k: _value(v) for k, v in zip(keys, row)}}, separators=(",", ":")) + "\n"
+
+def _csv(rows, header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for kind, keys, row in rows:
+        values = dict(zip(keys, row))
+        writer.writerow([kind, *(_value(values.get(k)) for k in header[1:])])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _chunked(pieces, compress):
+    """Group small pieces into ~64 KiB writes, optionally gzip-compressing as we go."""
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    parts, size = [], 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_BYTES:
+            data = "".join(parts).encode()
+            parts, size = [], 0
+            data = gzip.compress(data) if gzip else data
+            if data:
+                yield data
+    data = "".join(parts).encode()
+    yield gzip.compress(data) + gzip.flush() if gzip else data
+
+@export_bp.get("/export")
+@login_required
+def export_library():
+    user = current_user()
+    fmt = request.args.get("format") or "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        return {"error": "format must be ndjson or csv"}, 400
+    include = [name.strip() for name in (request.args.get("include") or ",".join(EXPORTS)).split(",") if name.strip()]
+    unknown = [name for name in include if name not in EXPORTS]
+    if unknown or not include:
+        return {"error": f"include must be a comma-separated list of {', '.join(EXPORTS)}"}, 400
+
+    connection = _snapshot()
+
+    def release():
+        if not connection.closed:
+            connection.rollback()
+            connection.close()
+
+    def rows():
+        try:
+            for name in include:
+                kind, columns = EXPORTS[name]
+                keys = [c.key for c in columns]
+                for row in connection.execute(_statement(name, user.id)):
+                    yield kind, keys, row
+        finally:
+            release()
+
+    if fmt == "csv":
+        header = ["type"]
+        for name in include:
+            header += [c.key for c in EXPORTS[name][1] if c.key not in header]
+        body, mimetype = _csv(rows(), header), "text/csv"
+    else:
+        body, mimetype = _ndjson(rows()), "application/x-ndjson"
+
+    compress = request.accept_encodings["gzip"] > 0
+    response = Response(_chunked(body, compress), mimetype=mimetype)
+    response.call_on_close(release)
+    response.headers["Content-Disposition"] = f'attachment; filename="setlist-export.{fmt}"'
+    response.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
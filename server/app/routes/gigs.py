@@ -1,17 +1,126 @@
 from datetime import date
 from flask import Blueprint, request
+from sqlalchemy import func
 from .. import db
 from ..models import Gig
 from ..auth_utils import login_required, current_user, get_owned
+from ..batch import commit
+from ..cache import cached
+from ..pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page, keyset
+from ..serialization import dump, load_columns, select_fields, sparse_fields
+from ..versioning import etagged
 
 gigs_bp = Blueprint("gigs", __name__)
 
+def _parse_day(args, name):
+    try:
+        return date.fromisoformat(args[name]) if args.get(name) else None
+    except ValueError:
+        raise ValueError(f"{name} must be ISO format YYYY-MM-DD")
+
+def _history_page(query, after, limit):
+    """Dated gigs newest first, then undated ones; each part is a seek on the (user_id, gig_date, id) index."""
+    dated = keyset(query.filter(Gig.gig_date.isnot(None)), [Gig.gig_date, Gig.id], True, after)
+    undated = query.filter(Gig.gig_date.is_(None)).order_by(Gig.id.desc())
+    if after is not None and after[0] is None:
+        rows = []
+        undated = undated.filter(Gig.id < after[1])
+    else:
+        rows = dated.limit(limit + 1).all()
+    if len(rows) <= limit:
+        rows += undated.limit(limit + 1 - len(rows)).all()
+    return rows[:limit], len(rows) > limit
+
+def _is_history():
+    return request.args.get("upcoming") not in ("1", "true")
+
+def _upcoming_from():
+    """The day an upcoming list starts on, so its ETag and cache entry roll over at midnight."""
+    return None if _is_history() else date.today().isoformat()
+
+def _calendar_month():
+    return request.args.get("month") or date.today().strftime("%Y-%m")
+
 @gigs_bp.get("/gigs")
 @login_required
+@etagged(vary=_upcoming_from)
+@cached(lambda user_id, kwargs, data: [f"user:{user_id}:gigs"], vary=_upcoming_from)
 def list_gigs():
     user = current_user()
-    gigs = Gig.query.filter_by(user_id=user.id).order_by(Gig.gig_date.desc().nullslast(), Gig.id.desc()).all()
-    return {"gigs": [g.to_dict() for g in gigs]}, 200
+    fields = sparse_fields("gig", primary=True)
+    try:
+        start, end = _parse_day(request.args, "from"), _parse_day(request.args, "to")
+    except ValueError as exc:
+        return {"error": str(exc)}, 400
+    upcoming = not _is_history()
+    if upcoming:
+        start = max(start or date.min, date.today())
+
+    query = Gig.query.filter_by(user_id=user.id)
+    if start:
+        query = query.filter(Gig.gig_date >= start)
+    if end:
+        query = query.filter(Gig.gig_date <= end)
+    if fields:
+        query = select_fields(query, "gig", fields, "gig_date")
+
+    if "cursor" not in request.args and "limit" not in request.args:
+        if upcoming:
+            query = query.order_by(Gig.gig_date.asc(), Gig.id.asc())
+        else:
+            query = query.order_by(Gig.gig_date.desc().nullslast(), Gig.id.desc())
+        return {"gigs": [dump(g, fields) for g in query]}, 200
+
+    mode = "upcoming" if upcoming else "-gig_date"
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 20), 100))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    after = None
+    if request.args.get("cursor"):
+        try:
+            day, gig_id = decode_cursor(request.args["cursor"], mode, 2)
+            after = (date.fromisoformat(day) if day else None, int(gig_id))
+        except (InvalidCursor, TypeError, ValueError):
+            return {"error": "invalid cursor"}, 400
+        if upcoming and after[0] is None:
+            return {"error": "invalid cursor"}, 400
+
+    if upcoming:
+        gigs, has_more = fetch_page(keyset(query, [Gig.gig_date, Gig.id], False, after), limit)
+    else:
+        gigs, has_more = _history_page(query, after, limit)
+    data = {"gigs": [dump(g, fields) for g in gigs], "limit": limit, "next_cursor": None}
+    if has_more:
+        last = gigs[-1]
+        data["next_cursor"] = encode_cursor(mode, [last.gig_date.isoformat() if last.gig_date else None, last.id])
+    return data, 200
+
+@gigs_bp.get("/gigs/calendar")
+@login_required
+@etagged(vary=_calendar_month)
+@cached(lambda user_id, kwargs, data: [f"user:{user_id}:gigs"], vary=_calendar_month)
+def gig_calendar():
+    user = current_user()
+    try:
+        year, month = (int(part) for part in _calendar_month().split("-"))
+        first = date(year, month, 1)
+        following = date(year + month // 12, month % 12 + 1, 1)
+    except ValueError:
+        return {"error": "month must be YYYY-MM"}, 400
+
+    rows = (
+        db.session.query(Gig.gig_date, func.count(Gig.id))
+        .filter(Gig.user_id == user.id, Gig.gig_date >= first, Gig.gig_date < following)
+        .group_by(Gig.gig_date)
+        .order_by(Gig.gig_date)
+        .all()
+    )
+    return {
+        "month": first.strftime("%Y-%m"),
+        "days": [{"date": day.isoformat(), "count": count} for day, count in rows],
+        "total": sum(count for _, count in rows),
+    }, 200
 
 @gigs_bp.post("/gigs")
 @login_required
@@ -37,17 +146,19 @@ def create_gig():
         notes=data.get("notes"),
     )
     db.session.add(gig)
-    db.session.commit()
+    commit()
     return gig.to_dict(), 201
 
 @gigs_bp.get("/gigs/<int:gig_id>")
 @login_required
+@etagged
 def get_gig(gig_id):
     user = current_user()
-    gig, err = get_owned(Gig, gig_id, user.id)
+    fields = sparse_fields("gig", primary=True)
+    gig, err = get_owned(Gig, gig_id, user.id, options=[load_columns("gig", fields)] if fields else ())
     if err:
         return err
-    return gig.to_dict(), 200
+    return gig.to_dict(fields), 200
 
 @gigs_bp.patch("/gigs/<int:gig_id>")
 @login_required
@@ -80,7 +191,7 @@ def update_gig(gig_id):
             except ValueError:
                 return {"error": "gig_date must be ISO format YYYY-MM-DD"}, 400
 
-    db.session.commit()
+    commit()
     return gig.to_dict(), 200
 
 @gigs_bp.delete("/gigs/<int:gig_id>")
@@ -91,5 +202,5 @@ def delete_gig(gig_id):
     if err:
         return err
     db.session.delete(gig)
-    db.session.commit()
+    commit()
     return {}, 204
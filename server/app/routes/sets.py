@@ -1,17 +1,89 @@
+import time
 from flask import Blueprint, request
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.orm import joinedload, selectinload
 from .. import db
 from ..models import Set, Track, SetItem, Gig
 from ..auth_utils import login_required, current_user, get_owned
+from ..batch import commit
+from ..cache import cached
+from ..changes import Change, record
+from ..optimizer import cost_matrix, optimize_order, path_cost
+from ..serialization import dump, load_columns, select_fields, sparse_fields
+from ..suggestions import index_cache
+from ..versioning import etagged
 
 sets_bp = Blueprint("sets", __name__)
 
+POSITION_GAP = 1024
+MAX_ITEMS_PER_ADD = 500
+
+WITH_ITEMS = (selectinload(Set.items).joinedload(SetItem.track),)
+
+def _summaries(user_id):
+    """Item count, BPM range, key spread and gig for every set of the user, from one grouped query."""
+    rows = (
+        db.session.query(
+            Set.id, Gig.id, Gig.title, Gig.venue, Gig.gig_date, Track.musical_key,
+            func.count(SetItem.id), func.count(Track.bpm), func.min(Track.bpm), func.max(Track.bpm), func.sum(Track.bpm),
+        )
+        .outerjoin(Gig, Set.gig_id == Gig.id)
+        .outerjoin(SetItem, SetItem.set_id == Set.id)
+        .outerjoin(Track, SetItem.track_id == Track.id)
+        .filter(Set.user_id == user_id)
+        .group_by(Set.id, Gig.id, Gig.title, Gig.venue, Gig.gig_date, Track.musical_key)
+        .all()
+    )
+
+    summaries = {}
+    bpm_totals = {}
+    for set_id, gig_id, title, venue, gig_date, key, items, with_bpm, low, high, total in rows:
+        summary = summaries.setdefault(set_id, {
+            "items": 0,
+            "bpm": {"min": None, "max": None, "avg": None},
+            "keys": {},
+            "gig": {"id": gig_id, "title": title, "venue": venue, "gig_date": gig_date.isoformat() if gig_date else None}
+            if gig_id is not None else None,
+        })
+        summary["items"] += items
+        if key is not None and items:
+            summary["keys"][key] = items
+        if with_bpm:
+            bpm = summary["bpm"]
+            bpm["min"] = low if bpm["min"] is None else min(bpm["min"], low)
+            bpm["max"] = high if bpm["max"] is None else max(bpm["max"], high)
+            count, bpm_sum = bpm_totals.get(set_id, (0, 0))
+            bpm_totals[set_id] = (count + with_bpm, bpm_sum + total)
+    for set_id, (count, bpm_sum) in bpm_totals.items():
+        summaries[set_id]["bpm"]["avg"] = round(bpm_sum / count, 1)
+    return summaries
+
+def _wants_summary():
+    return "summary" in (request.args.get("include") or "").split(",")
+
+def _list_tags(user_id, kwargs, data):
+    tags = [f"user:{user_id}:sets"]
+    if _wants_summary():
+        tags += [f"user:{user_id}:tracks", f"user:{user_id}:gigs"]
+    return tags
+
 @sets_bp.get("/sets")
 @login_required
+@etagged
+@cached(_list_tags)
 def list_sets():
     user = current_user()
-    sets = Set.query.filter_by(user_id=user.id).order_by(Set.id.desc()).all()
-    return {"sets": [s.to_dict() for s in sets]}, 200
+    fields = sparse_fields("set", primary=True)
+    query = Set.query.filter_by(user_id=user.id).order_by(Set.id.desc())
+    if fields:
+        fields = tuple(f for f in fields if f != "items")
+        query = select_fields(query, "set", fields)
+    sets = [dump(s, fields) for s in query]
+    if _wants_summary():
+        summaries = _summaries(user.id)
+        for data in sets:
+            data["summary"] = summaries.get(data["id"])
+    return {"sets": sets}, 200
 
 @sets_bp.post("/sets")
 @login_required
@@ -30,17 +102,41 @@ def create_set():
 
     s = Set(user_id=user.id, gig_id=gig_id, name=name, notes=data.get("notes"))
     db.session.add(s)
-    db.session.commit()
+    commit()
     return s.to_dict(), 201
 
+def _items_options(item_fields, track_fields):
+    """Eager-load a set's items (and their tracks, if serialized) reading only the requested columns."""
+    items = selectinload(Set.items)
+    if item_fields:
+        items = items.options(load_columns("item", item_fields, "set_id", "track_id", "position"))
+    if item_fields and "track" not in item_fields:
+        return (items,)
+    track = joinedload(SetItem.track)
+    if track_fields:
+        track = track.options(load_columns("track", track_fields))
+    return (items.options(track),)
+
+def _set_tags(user_id, kwargs, data):
+    tags = {f"set:{kwargs['set_id']}"}
+    for item in data.get("items", ()):
+        tags.add(f"track:{item['track_id']}" if "track_id" in item else f"user:{user_id}:tracks")
+    return tags
+
 @sets_bp.get("/sets/<int:set_id>")
 @login_required
+@etagged
+@cached(_set_tags)
 def get_set(set_id):
     user = current_user()
-    s, err = get_owned(Set, set_id, user.id)
+    fields = sparse_fields("set", primary=True)
+    item_fields = sparse_fields("item")
+    track_fields = sparse_fields("track")
+    options = () if fields and "items" not in fields else _items_options(item_fields, track_fields)
+    s, err = get_owned(Set, set_id, user.id, options=options)
     if err:
         return err
-    return s.to_dict(include_items=True), 200
+    return s.to_dict(include_items=True, fields=fields, item_fields=item_fields, track_fields=track_fields), 200
 
 @sets_bp.patch("/sets/<int:set_id>")
 @login_required
@@ -71,7 +167,7 @@ def update_set(set_id):
                 return {"error": "gig_id not found"}, 404
             s.gig_id = gig_id
 
-    db.session.commit()
+    commit()
     return s.to_dict(), 200
 
 @sets_bp.delete("/sets/<int:set_id>")
@@ -82,17 +178,20 @@ def delete_set(set_id):
     if err:
         return err
     db.session.delete(s)
-    db.session.commit()
+    commit()
     return {}, 204
 
 @sets_bp.get("/sets/<int:set_id>/items")
 @login_required
+@etagged
 def list_items(set_id):
     user = current_user()
-    s, err = get_owned(Set, set_id, user.id)
+    item_fields = sparse_fields("item", primary=True)
+    track_fields = sparse_fields("track")
+    s, err = get_owned(Set, set_id, user.id, options=_items_options(item_fields, track_fields))
     if err:
         return err
-    return {"items": [i.to_dict() for i in s.items]}, 200
+    return {"items": [i.to_dict(item_fields, track_fields) for i in s.items]}, 200
 
 @sets_bp.post("/sets/<int:set_id>/items")
 @login_required
@@ -103,6 +202,9 @@ def add_item(set_id):
         return err
 
     data = request.get_json() or {}
+    if "track_ids" in data:
+        return add_items(s, user, data)
+
     track_id = data.get("track_id")
     if not track_id:
         return {"error": "track_id is required"}, 400
@@ -112,13 +214,69 @@ def add_item(set_id):
         return ({"error": "track not found"}, 404)
 
     max_pos = db.session.query(func.max(SetItem.position)).filter(SetItem.set_id == s.id).scalar()
-    next_pos = 0 if max_pos is None else max_pos + 1
+    next_pos = 0 if max_pos is None else max_pos + POSITION_GAP
 
     item = SetItem(set_id=s.id, track_id=track.id, position=next_pos, notes=data.get("notes"))
     db.session.add(item)
-    db.session.commit()
+    commit()
     return item.to_dict(), 201
 
+def _positions_between(lower, upper, count):
+    if lower is None and upper is None:
+        return [k * POSITION_GAP for k in range(count)]
+    if upper is None:
+        return [lower + (k + 1) * POSITION_GAP for k in range(count)]
+    if lower is None:
+        return [upper - (count - k) * POSITION_GAP for k in range(count)]
+    step = (upper - lower) // (count + 1)
+    if step < 1:
+        return None
+    return [lower + (k + 1) * step for k in range(count)]
+
+def add_items(s, user, data):
+    track_ids = data.get("track_ids")
+    if not isinstance(track_ids, list) or not track_ids or not all(isinstance(t, int) and not isinstance(t, bool) for t in track_ids):
+        return {"error": "track_ids must be a non-empty list of track ids"}, 400
+    if len(track_ids) > MAX_ITEMS_PER_ADD:
+        return {"error": f"at most {MAX_ITEMS_PER_ADD} tracks per request"}, 400
+
+    owned = {t for (t,) in db.session.query(Track.id).filter(Track.user_id == user.id, Track.id.in_(set(track_ids)))}
+    missing = sorted(set(track_ids) - owned)
+    if missing:
+        return {"error": "track not found", "track_ids": missing}, 404
+
+    after_id = data.get("after")
+    before_id = data.get("before")
+    if after_id is None and before_id is None:
+        max_pos = db.session.query(func.max(SetItem.position)).filter(SetItem.set_id == s.id).scalar()
+        positions = _positions_between(max_pos, None, len(track_ids))
+    else:
+        lower, upper, err = _gap_bounds(s.id, None, after_id, before_id)
+        if err:
+            return err
+        positions = _positions_between(lower, upper, len(track_ids))
+        if positions is None:
+            apply_order(s, [i.id for i in s.items])
+            lower, upper, _ = _gap_bounds(s.id, None, after_id, before_id)
+            positions = _positions_between(lower, upper, len(track_ids))
+
+    rows = [
+        {"set_id": s.id, "track_id": track_id, "position": position, "notes": data.get("notes")}
+        for track_id, position in zip(track_ids, positions)
+    ]
+    id_at = dict(db.session.execute(insert(SetItem).returning(SetItem.position, SetItem.id), rows).all())
+    ids = [id_at[row["position"]] for row in rows]
+    record(db.session, *(
+        Change("set_item", "create", item_id, user.id, s.id, {"id": item_id, **row})
+        for item_id, row in zip(ids, rows)
+    ))
+
+    db.session.expire(s, ["items"])
+    s, _ = get_owned(Set, s.id, user.id, options=WITH_ITEMS)
+    items = [i.to_dict() for i in s.items]
+    commit()
+    return {"items": items, "added": ids}, 201
+
 @sets_bp.patch("/sets/<int:set_id>/items/<int:item_id>")
 @login_required
 def update_item(set_id, item_id):
@@ -141,7 +299,7 @@ def update_item(set_id, item_id):
         except (TypeError, ValueError):
             return {"error": "position must be integer"}, 400
 
-    db.session.commit()
+    commit()
     return item.to_dict(), 200
 
 @sets_bp.delete("/sets/<int:set_id>/items/<int:item_id>")
@@ -157,14 +315,14 @@ def delete_item(set_id, item_id):
         return {"error": "Not found"}, 404
 
     db.session.delete(item)
-    db.session.commit()
+    commit()
     return {}, 204
 
 @sets_bp.put("/sets/<int:set_id>/items/reorder")
 @login_required
 def reorder_items(set_id):
     user = current_user()
-    s, err = get_owned(Set, set_id, user.id)
+    s, err = get_owned(Set, set_id, user.id, options=WITH_ITEMS)
     if err:
         return err
 
@@ -173,16 +331,172 @@ def reorder_items(set_id):
     if not isinstance(order, list):
         return {"error": "order must be a list of item ids"}, 400
 
-    items_by_id = {i.id: i for i in s.items}
-    if set(order) != set(items_by_id.keys()):
+    if set(order) != {i.id for i in s.items}:
         return {"error": "order must include all current item ids exactly once"}, 400
 
+    items = [i.to_dict() for i in apply_order(s, order)]
+    commit()
+    return {"items": items}, 200
+
+def apply_order(s, order):
+    items_by_id = {i.id: i for i in s.items}
+    below = min([0, *(i.position for i in s.items)]) - 1
     for idx, item_id in enumerate(order):
-        items_by_id[item_id].position = idx + 1000
+        items_by_id[item_id].position = below - idx
     db.session.flush()
 
     for idx, item_id in enumerate(order):
-        items_by_id[item_id].position = idx
+        items_by_id[item_id].position = idx * POSITION_GAP
+    return [items_by_id[item_id] for item_id in order]
+
+def _gap_bounds(set_id, item_id, after_id, before_id):
+    ids = [i for i in (after_id, before_id) if i is not None]
+    positions = dict(db.session.query(SetItem.id, SetItem.position).filter(SetItem.set_id == set_id, SetItem.id.in_(ids)))
+    if len(positions) != len(ids):
+        return None, None, ({"error": "neighbour item not found"}, 404)
+
+    others = db.session.query(SetItem.position).filter(SetItem.set_id == set_id, SetItem.id != item_id)
+    lower = positions.get(after_id)
+    upper = positions.get(before_id)
+    if before_id is None:
+        upper = others.filter(SetItem.position > lower).order_by(SetItem.position.asc()).limit(1).scalar()
+    elif after_id is None:
+        lower = others.filter(SetItem.position < upper).order_by(SetItem.position.desc()).limit(1).scalar()
+    elif lower >= upper or others.filter(SetItem.position > lower, SetItem.position < upper).first():
+        return None, None, ({"error": "after and before must be adjacent items"}, 400)
+    return lower, upper, None
+
+def _position_between(lower, upper):
+    if lower is None and upper is None:
+        return 0
+    if lower is None:
+        return upper - POSITION_GAP
+    if upper is None:
+        return lower + POSITION_GAP
+    if upper - lower >= 2:
+        return (lower + upper) // 2
+    return None
+
+@sets_bp.post("/sets/<int:set_id>/items/<int:item_id>/move")
+@login_required
+def move_item(set_id, item_id):
+    user = current_user()
+    s, err = get_owned(Set, set_id, user.id)
+    if err:
+        return err
+
+    item = SetItem.query.filter_by(id=item_id, set_id=s.id).first()
+    if not item:
+        return {"error": "Not found"}, 404
+
+    data = request.get_json() or {}
+    after_id = data.get("after")
+    before_id = data.get("before")
+    if after_id is None and before_id is None:
+        return {"error": "after or before is required"}, 400
+    if item.id in (after_id, before_id):
+        return {"error": "an item cannot be moved next to itself"}, 400
+
+    lower, upper, err = _gap_bounds(s.id, item.id, after_id, before_id)
+    if err:
+        return err
+
+    position = _position_between(lower, upper)
+    rebalanced = position is None
+    if rebalanced:
+        apply_order(s, [i.id for i in s.items])
+        lower, upper, _ = _gap_bounds(s.id, item.id, after_id, before_id)
+        position = _position_between(lower, upper)
+
+    item.position = position
+    commit()
+    return {"item": item.to_dict(), "rebalanced": rebalanced}, 200
+
+@sets_bp.post("/sets/<int:set_id>/optimize")
+@login_required
+def optimize_set(set_id):
+    user = current_user()
+    s, err = get_owned(Set, set_id, user.id, options=WITH_ITEMS)
+    if err:
+        return err
+
+    data = request.get_json() or {}
+    try:
+        budget_ms = max(1, min(int(data.get("budget_ms") or 200), 5000))
+    except (TypeError, ValueError):
+        return {"error": "budget_ms must be an integer"}, 400
+
+    items = list(s.items)
+    index_of = {item.id: idx for idx, item in enumerate(items)}
+    opener = data.get("opener_item_id")
+    closer = data.get("closer_item_id")
+    for name, item_id in (("opener_item_id", opener), ("closer_item_id", closer)):
+        if item_id is None:
+            continue
+        if not isinstance(item_id, int) or isinstance(item_id, bool):
+            return {"error": f"{name} must be an item id"}, 400
+        if item_id not in index_of:
+            return {"error": f"{name} is not an item of this set"}, 400
+    if opener is not None and opener == closer:
+        return {"error": "opener_item_id and closer_item_id must differ"}, 400
+
+    costs = cost_matrix(
+        (i.track.bpm, i.track.musical_key, i.track.energy) if i.track else (None, None, None) for i in items
+    )
+    started = time.perf_counter()
+    order, cost = optimize_order(costs, budget_ms, first=index_of.get(opener), last=index_of.get(closer))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    order_ids = [items[k].id for k in order]
+
+    result = {
+        "order": order_ids,
+        "cost": round(cost, 4),
+        "current_cost": round(path_cost(costs, list(range(len(items)))), 4),
+        "elapsed_ms": round(elapsed_ms, 1),
+        "applied": False,
+    }
+    if data.get("apply"):
+        result["items"] = [i.to_dict() for i in apply_order(s, order_ids)]
+        result["applied"] = True
+        commit()
+    return result, 200
+
+@sets_bp.get("/sets/<int:set_id>/suggestions")
+@login_required
+def suggest_next_track(set_id):
+    user = current_user()
+    s, err = get_owned(Set, set_id, user.id)
+    if err:
+        return err
 
-    db.session.commit()
-    return {"items": [i.to_dict() for i in s.items]}, 200
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 10), 50))
+        after_id = int(request.args["after_track_id"]) if request.args.get("after_track_id") else None
+    except ValueError:
+        return {"error": "limit and after_track_id must be integers"}, 400
+
+    in_set = [track_id for (track_id,) in db.session.query(SetItem.track_id).filter_by(set_id=s.id).order_by(SetItem.position)]
+    if after_id is None:
+        if not in_set:
+            return {"error": "set has no items; pass after_track_id"}, 400
+        after_id = in_set[-1]
+
+    index = index_cache().get(user.id)
+    ref = index.reference(after_id)
+    if ref is None:
+        return {"error": "track not found"}, 404
+
+    ranked = index.top(ref, limit, exclude=set(in_set) | {after_id})
+    tracks = {t.id: t for t in Track.query.filter(Track.id.in_([track_id for track_id, _, _ in ranked])).all()}
+    return {
+        "after_track_id": after_id,
+        "suggestions": [
+            {
+                "track": tracks[track_id].to_dict(),
+                "score": round(score, 4),
+                "scores": {name: round(value, 4) for name, value in parts.items()},
+            }
+            for track_id, score, parts in ranked
+            if track_id in tracks
+        ],
+    }, 200
@@ -0,0 +1,49 @@
+from flask import Blueprint, request
+from ..auth_utils import login_required, current_user
+from ..models import SetItem
+from ..pagination import InvalidCursor
+from ..sync import changes_since, current_token, decode_token, load_current
+
+sync_bp = Blueprint("sync", __name__)
+
+SYNC_MAX_LIMIT = 1000
+KEYS = {"gig": "gigs", "track": "tracks", "set": "sets", "set_item": "set_items"}
+ITEM_FIELDS = tuple(f for f in SetItem.FIELDS if f != "track")
+
+def _dump(entity, obj):
+    if entity == "set_item":
+        return obj.to_dict(ITEM_FIELDS)
+    if entity == "set":
+        return obj.to_dict(fields=obj.FIELDS)
+    return obj.to_dict()
+
+@sync_bp.get("/sync")
+@login_required
+def sync():
+    user = current_user()
+    if not request.args.get("since"):
+        return {"next": current_token(user.id), "has_more": False}, 200
+
+    try:
+        since = decode_token(request.args["since"])
+    except InvalidCursor:
+        return {"error": "invalid sync token"}, 400
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 500), SYNC_MAX_LIMIT))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+
+    latest, token, has_more = changes_since(user.id, since, limit)
+    data = {key: [] for key in KEYS.values()}
+    data["deleted"] = {key: [] for key in KEYS.values()}
+    for entity, ops in latest.items():
+        live = [entity_id for entity_id, op in ops.items() if op != "delete"]
+        found = set()
+        for obj in load_current(user.id, entity, live) if live else ():
+            found.add(obj.id)
+            data[KEYS[entity]].append(_dump(entity, obj))
+        data["deleted"][KEYS[entity]] = sorted(entity_id for entity_id in ops if entity_id not in found)
+
+    data["next"] = token
+    data["has_more"] = has_more
+    return data, 200
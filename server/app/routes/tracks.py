@@ -1,73 +1,323 @@
+import csv
+import time
+from datetime import date
+import xml.etree.ElementTree as ET
 from flask import Blueprint, request
-from sqlalchemy import or_
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import aliased
 from .. import db
 from ..models import Track, SetItem, Set, Gig
 from ..auth_utils import login_required, current_user, get_owned
+from ..batch import commit
+from ..cache import cached
+from ..changes import Change, record
+from ..duplicates import find_duplicates, fingerprint
+from ..importers import IMPORTERS, detect_format
+from ..pagination import InvalidCursor, TTLCache, decode_cursor, encode_cursor, fetch_page, keyset
+from ..search import apply_search
+from ..serialization import dump, load_columns, select_fields, sparse_fields
+from ..stats import refresh as refresh_stats
+from ..versioning import etagged, user_version
 
 tracks_bp = Blueprint("tracks", __name__)
 
+TRACK_SORTS = {
+    "id": Track.id,
+    "title": Track.title,
+    "artist": Track.artist,
+    "play_count": Track.play_count,
+    "set_count": Track.set_count,
+}
+
+_track_totals = TTLCache(maxsize=1024, ttl=30)
+
+def _count_tracks(user_id, query):
+    key = (user_id, _filter_key(request.args), user_version(user_id))
+    total = _track_totals.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        _track_totals.set(key, total)
+    return total
+
+def _stats_filters(args):
+    """Play-stat filters from the query string; returns (conditions, error)."""
+    conditions = []
+    played = args.get("played")
+    if played is not None:
+        if played not in ("0", "1", "true", "false"):
+            return None, "played must be 1 or 0"
+        conditions.append(Track.play_count > 0 if played in ("1", "true") else Track.play_count == 0)
+    if args.get("min_plays"):
+        try:
+            conditions.append(Track.play_count >= int(args["min_plays"]))
+        except ValueError:
+            return None, "min_plays must be an integer"
+    for name in ("played_since", "played_before"):
+        if not args.get(name):
+            continue
+        try:
+            day = date.fromisoformat(args[name])
+        except ValueError:
+            return None, f"{name} must be YYYY-MM-DD"
+        conditions.append(Track.last_played >= day if name == "played_since" else Track.last_played < day)
+    return conditions, None
+
+def _attribute_filters(args):
+    """bpm_min / bpm_max / key / energy filters; returns (conditions, error)."""
+    conditions = []
+    for name in ("bpm_min", "bpm_max"):
+        if not args.get(name):
+            continue
+        try:
+            bpm = int(args[name])
+        except ValueError:
+            return None, f"{name} must be an integer"
+        conditions.append(Track.bpm >= bpm if name == "bpm_min" else Track.bpm <= bpm)
+    for name, column in (("key", Track.musical_key), ("energy", Track.energy)):
+        values = {v.strip() for v in (args.get(name) or "").split(",") if v.strip()}
+        if values:
+            conditions.append(column.in_(values | {v.upper() for v in values} | {v.lower() for v in values}))
+    return conditions, None
+
+FILTER_ARGS = ("q", "played", "min_plays", "played_since", "played_before", "bpm_min", "bpm_max", "key", "energy")
+BPM_FACET_WIDTH = 5
+FACETS = {
+    "bpm": (Track.bpm // BPM_FACET_WIDTH * BPM_FACET_WIDTH).label("bpm_bucket"),
+    "key": Track.musical_key,
+    "energy": Track.energy,
+}
+
+_track_facets = TTLCache(maxsize=1024, ttl=300)
+
+def _filter_key(args):
+    return tuple((name, args.get(name) or "") for name in FILTER_ARGS)
+
+def _facet_counts(user_id, names, query):
+    """Bucketed counts for `names` over the filtered tracks, from one grouped query, cached per user version."""
+    key = (user_id, user_version(user_id), _filter_key(request.args), names)
+    facets = _track_facets.get(key)
+    if facets is not None:
+        return facets
+
+    columns = [FACETS[name] for name in names]
+    rows = query.order_by(None).with_entities(*columns, func.count(Track.id)).group_by(*columns).all()
+    counts = {name: {} for name in names}
+    for *values, count in rows:
+        for name, value in zip(names, values):
+            counts[name][value] = counts[name].get(value, 0) + count
+
+    facets = {}
+    for name, buckets in counts.items():
+        if name == "bpm":
+            facets[name] = [
+                {"min": b, "max": b + BPM_FACET_WIDTH - 1 if b is not None else None, "count": n}
+                for b, n in sorted(buckets.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))
+            ]
+        else:
+            facets[name] = [
+                {"value": v, "count": n}
+                for v, n in sorted(buckets.items(), key=lambda kv: (-kv[1], kv[0] is None, kv[0] or ""))
+            ]
+    _track_facets.set(key, facets)
+    return facets
+
+def _is_first_page():
+    return (request.args.get("page") or "1") == "1" and not request.args.get("cursor")
+
 @tracks_bp.get("/tracks")
 @login_required
+@etagged
+@cached(lambda user_id, kwargs, data: [f"user:{user_id}:tracks"], when=_is_first_page)
 def list_tracks():
     user = current_user()
     q = (request.args.get("q") or "").strip()
+
+    sort = request.args.get("sort") or "-id"
+    sort_name = sort.lstrip("-")
+    if sort_name not in TRACK_SORTS:
+        return {"error": f"sort must be one of {', '.join(TRACK_SORTS)} (prefix - for descending)"}, 400
+    descending = sort.startswith("-")
+    columns = [TRACK_SORTS[sort_name]] if sort_name == "id" else [TRACK_SORTS[sort_name], Track.id]
+
+    conditions, error = _stats_filters(request.args)
+    if error:
+        return {"error": error}, 400
+    attributes, error = _attribute_filters(request.args)
+    if error:
+        return {"error": error}, 400
+    facets = tuple(f.strip() for f in (request.args.get("facets") or "").split(",") if f.strip())
+    if any(f not in FACETS for f in facets):
+        return {"error": f"facets must be a list of {', '.join(FACETS)}"}, 400
+    fields = sparse_fields("track", primary=True)
+    query = Track.query.filter_by(user_id=user.id).filter(*conditions, *attributes)
+    filtered = apply_search(query, q, ranked=False) if q else query
+
+    if "cursor" in request.args or "limit" in request.args:
+        try:
+            limit = max(1, min(int(request.args.get("limit") or 20), 100))
+        except ValueError:
+            return {"error": "limit must be an integer"}, 400
+        after = None
+        if request.args.get("cursor"):
+            try:
+                after = decode_cursor(request.args["cursor"], sort, len(columns))
+            except InvalidCursor:
+                return {"error": "invalid cursor"}, 400
+
+        page_query = keyset(filtered, columns, descending, after)
+        if fields:
+            page_query = select_fields(page_query, "track", fields, *(c.key for c in columns))
+        tracks, has_more = fetch_page(page_query, limit)
+
+        data = {"tracks": [dump(t, fields) for t in tracks], "limit": limit, "next_cursor": None}
+        if has_more:
+            last = tracks[-1]
+            data["next_cursor"] = encode_cursor(sort, [getattr(last, c.key) for c in columns])
+        if request.args.get("include_total") in ("1", "true"):
+            data["total"] = _count_tracks(user.id, filtered)
+        if facets:
+            data["facets"] = _facet_counts(user.id, facets, filtered)
+        return data, 200
+
     page = int(request.args.get("page") or 1)
     per_page = int(request.args.get("per_page") or 20)
     per_page = max(1, min(per_page, 100))
 
-    query = Track.query.filter_by(user_id=user.id)
+    if q and "sort" not in request.args:
+        query = apply_search(query, q)
+    else:
+        query = keyset(filtered, columns, descending)
+    if fields:
+        query = select_fields(query, "track", fields)
 
-    if q:
-        like = f"%{q.lower()}%"
-        query = query.filter(or_(Track.title.ilike(like), Track.artist.ilike(like), Track.energy.ilike(like)))
-
-    pagination = query.order_by(Track.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
-    return {
-        "tracks": [t.to_dict() for t in pagination.items],
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    data = {
+        "tracks": [dump(t, fields) for t in pagination.items],
         "page": pagination.page,
         "per_page": pagination.per_page,
         "total": pagination.total,
         "pages": pagination.pages,
-    }, 200
+    }
+    if facets:
+        data["facets"] = _facet_counts(user.id, facets, filtered)
+    return data, 200
 
-@tracks_bp.post("/tracks")
-@login_required
-def create_track():
-    user = current_user()
-    data = request.get_json() or {}
+TEXT_FIELDS = ("title", "artist", "musical_key", "energy", "notes")
+
+def _text_error(data):
+    for name in TEXT_FIELDS:
+        if data.get(name) is not None and not isinstance(data[name], str):
+            return f"{name} must be a string"
+    return None
+
+def parse_track(data):
+    error = _text_error(data)
+    if error:
+        return None, error
     title = (data.get("title") or "").strip()
     artist = (data.get("artist") or "").strip()
     if not title or not artist:
-        return {"error": "title and artist are required"}, 400
+        return None, "title and artist are required"
 
     bpm = data.get("bpm")
     if bpm is not None:
         try:
             bpm = int(bpm)
         except (TypeError, ValueError):
-            return {"error": "bpm must be an integer"}, 400
-
-    track = Track(
-        user_id=user.id,
-        title=title,
-        artist=artist,
-        bpm=bpm,
-        musical_key=(data.get("musical_key") or "").strip() or None,
-        energy=(data.get("energy") or "").strip() or None,
-        notes=data.get("notes"),
-    )
+            return None, "bpm must be an integer"
+
+    return {
+        "title": title,
+        "artist": artist,
+        "fingerprint": fingerprint(artist, title),
+        "bpm": bpm,
+        "musical_key": (data.get("musical_key") or "").strip() or None,
+        "energy": (data.get("energy") or "").strip() or None,
+        "notes": data.get("notes"),
+    }, None
+
+@tracks_bp.post("/tracks")
+@login_required
+def create_track():
+    user = current_user()
+    data = request.get_json() or {}
+    fields, error = parse_track(data)
+    if error:
+        return {"error": error}, 400
+
+    track = Track(user_id=user.id, **fields)
     db.session.add(track)
-    db.session.commit()
+    commit()
     return track.to_dict(), 201
 
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+@tracks_bp.post("/tracks/import")
+@login_required
+def import_tracks():
+    user = current_user()
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    fmt = detect_format(
+        request.args.get("format"),
+        upload.mimetype if upload else request.mimetype,
+        upload.filename if upload else None,
+    )
+    if fmt not in IMPORTERS:
+        return {"error": f"format must be one of {', '.join(IMPORTERS)}"}, 400
+
+    started = time.perf_counter()
+    rows = imported = failed = 0
+    errors = []
+    batch = []
+    ids = []
+    try:
+        for row_num, data, error in IMPORTERS[fmt](stream):
+            rows += 1
+            if error is None:
+                fields, error = parse_track(data)
+            if error:
+                failed += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append({"row": row_num, "error": error})
+                continue
+            fields["user_id"] = user.id
+            batch.append(fields)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                ids.extend(db.session.scalars(insert(Track).returning(Track.id), batch))
+                imported += len(batch)
+                batch = []
+        if batch:
+            ids.extend(db.session.scalars(insert(Track).returning(Track.id), batch))
+            imported += len(batch)
+        record(db.session, Change("track", "bulk", None, user.id, None, {"ids": ids}))
+    except (ET.ParseError, UnicodeDecodeError, csv.Error) as exc:
+        db.session.rollback()
+        return {"error": f"could not parse {fmt} upload: {exc}"}, 400
+
+    commit()
+    elapsed = time.perf_counter() - started
+    return {
+        "format": fmt,
+        "rows": rows,
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+    }, 200
+
 @tracks_bp.get("/tracks/<int:track_id>")
 @login_required
+@etagged
 def get_track(track_id):
     user = current_user()
-    track, err = get_owned(Track, track_id, user.id)
+    fields = sparse_fields("track", primary=True)
+    track, err = get_owned(Track, track_id, user.id, options=[load_columns("track", fields)] if fields else ())
     if err:
         return err
-    return track.to_dict(), 200
+    return track.to_dict(fields), 200
 
 @tracks_bp.patch("/tracks/<int:track_id>")
 @login_required
@@ -78,6 +328,9 @@ def update_track(track_id):
         return err
 
     data = request.get_json() or {}
+    error = _text_error(data)
+    if error:
+        return {"error": error}, 400
 
     if "title" in data:
         title = (data.get("title") or "").strip()
@@ -110,7 +363,10 @@ def update_track(track_id):
     if "notes" in data:
         track.notes = data.get("notes")
 
-    db.session.commit()
+    if "title" in data or "artist" in data:
+        track.fingerprint = fingerprint(track.artist, track.title)
+
+    commit()
     return track.to_dict(), 200
 
 @tracks_bp.delete("/tracks/<int:track_id>")
@@ -121,20 +377,37 @@ def delete_track(track_id):
     if err:
         return err
     db.session.delete(track)
-    db.session.commit()
+    commit()
     return {}, 204
 
 
+def _usage_tags(user_id, kwargs, data):
+    tags = {f"track:{kwargs['track_id']}"}
+    for u in data["usage"]:
+        tags.add(f"set:{u['set_id']}")
+        if u["gig"]:
+            tags.add(f"gig:{u['gig']['id']}")
+    return tags
+
 @tracks_bp.get("/tracks/<int:track_id>/usage")
 @login_required
+@etagged
+@cached(_usage_tags)
 def track_usage(track_id):
     user = current_user()
     track, err = get_owned(Track, track_id, user.id)
     if err:
         return err
 
+    earlier = aliased(SetItem)
+    slot = (
+        select(func.count(earlier.id))
+        .where(earlier.set_id == SetItem.set_id, earlier.position < SetItem.position)
+        .correlate(SetItem)
+        .scalar_subquery()
+    )
     rows = (
-        db.session.query(SetItem, Set, Gig)
+        db.session.query(SetItem, Set, Gig, slot)
         .join(Set, SetItem.set_id == Set.id)
         .outerjoin(Gig, Set.gig_id == Gig.id)
         .filter(SetItem.track_id == track.id, Set.user_id == user.id)
@@ -143,21 +416,118 @@ def track_usage(track_id):
     )
 
     usage = []
-    for item, s, g in rows:
+    for item, s, g, index in rows:
         usage.append(
             {
                 "set_item_id": item.id,
                 "set_id": s.id,
                 "set_name": s.name,
                 "position": item.position,
+                "index": index,
                 "gig": g.to_dict() if g else None,
             }
         )
 
-    last_played = None
-    for u in usage:
-        if u["gig"] and u["gig"].get("gig_date"):
-            last_played = u["gig"]["gig_date"]
-            break
+    data = track.to_dict()
+    return {"track": data, "usage": usage, "last_played": data["last_played"]}, 200
 
-    return {"track": track.to_dict(), "usage": usage, "last_played": last_played}, 200
+@tracks_bp.get("/tracks/stats")
+@login_required
+@etagged
+@cached(lambda user_id, kwargs, data: [f"user:{user_id}:tracks"])
+def library_stats():
+    user = current_user()
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 10), 100))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    mine = Track.query.filter_by(user_id=user.id)
+    tracks, played, plays, in_sets, last_played = mine.with_entities(
+        func.count(Track.id),
+        func.count(Track.id).filter(Track.play_count > 0),
+        func.coalesce(func.sum(Track.play_count), 0),
+        func.count(Track.id).filter(Track.set_count > 0),
+        func.max(Track.last_played),
+    ).one()
+    top = mine.filter(Track.play_count > 0).order_by(Track.play_count.desc(), Track.id.desc()).limit(limit)
+    return {
+        "tracks": tracks,
+        "played": played,
+        "never_played": tracks - played,
+        "in_sets": in_sets,
+        "total_plays": plays,
+        "last_played": last_played.isoformat() if last_played else None,
+        "most_played": [t.to_dict() for t in top],
+    }, 200
+
+MAX_MERGE_DUPLICATES = 100
+
+@tracks_bp.get("/tracks/duplicates")
+@login_required
+@etagged
+@cached(lambda user_id, kwargs, data: [f"user:{user_id}:tracks"])
+def duplicate_tracks():
+    user = current_user()
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 50), 500))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    groups = find_duplicates(user.id)
+    shown = groups[:limit]
+
+    by_fingerprint = {}
+    fingerprints = {fp for _, members in shown for fp in members}
+    if fingerprints:
+        tracks = Track.query.filter(Track.user_id == user.id, Track.fingerprint.in_(fingerprints)).order_by(Track.id)
+        for t in tracks:
+            by_fingerprint.setdefault(t.fingerprint, []).append(t.to_dict())
+    return {
+        "groups": [
+            {
+                "match": kind,
+                "fingerprint": members[0],
+                "tracks": sorted((t for fp in members for t in by_fingerprint.get(fp, ())), key=lambda t: t["id"]),
+            }
+            for kind, members in shown
+        ],
+        "total": len(groups),
+    }, 200
+
+@tracks_bp.post("/tracks/<int:track_id>/merge")
+@login_required
+def merge_tracks(track_id):
+    user = current_user()
+    track, err = get_owned(Track, track_id, user.id)
+    if err:
+        return err
+
+    data = request.get_json() or {}
+    duplicate_ids = data.get("duplicate_ids")
+    if not isinstance(duplicate_ids, list) or not duplicate_ids or not all(isinstance(t, int) and not isinstance(t, bool) for t in duplicate_ids):
+        return {"error": "duplicate_ids must be a non-empty list of track ids"}, 400
+    if len(duplicate_ids) > MAX_MERGE_DUPLICATES:
+        return {"error": f"at most {MAX_MERGE_DUPLICATES} tracks per merge"}, 400
+    if track.id in duplicate_ids:
+        return {"error": "a track cannot be merged into itself"}, 400
+
+    losers = set(duplicate_ids)
+    owned = {t for (t,) in db.session.query(Track.id).filter(Track.user_id == user.id, Track.id.in_(losers))}
+    missing = sorted(losers - owned)
+    if missing:
+        return {"error": "track not found", "track_ids": missing}, 404
+
+    repointed = db.session.execute(
+        update(SetItem).where(SetItem.track_id.in_(losers)).values(track_id=track.id).returning(SetItem.id, SetItem.set_id),
+        execution_options={"synchronize_session": False},
+    ).all()
+    db.session.execute(delete(Track).where(Track.id.in_(losers)), execution_options={"synchronize_session": False})
+    refresh_stats(db.session.connection(), Track.id == track.id)
+    record(
+        db.session,
+        *(Change("set_item", "update", item_id, user.id, set_id, {"track_id": track.id}) for item_id, set_id in repointed),
+        *(Change("track", "delete", loser, user.id, None, None) for loser in sorted(losers)),
+        Change("track", "update", track.id, user.id, None, None),
+    )
+    db.session.expire(track)
+    commit()
+    return {"track": track.to_dict(), "merged": sorted(losers), "repointed": len(repointed)}, 200
@@ -0,0 +1,118 @@
+import re
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import column, event, func, literal_column, or_, table, text
+from . import db
+from .models import Track
+
+FIELDS = ("title", "artist", "energy")
+
+_TERM = re.compile(r"(?:(\w+):)?(\w+)", re.UNICODE)
+_PG_WEIGHTS = {"title": "A", "artist": "B", "energy": "C"}
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5("
+    "title, artist, energy, content='tracks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tracks_fts_ai AFTER INSERT ON tracks BEGIN "
+    "INSERT INTO tracks_fts(rowid, title, artist, energy) VALUES (new.id, new.title, new.artist, new.energy); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_fts_ad AFTER DELETE ON tracks BEGIN "
+    "INSERT INTO tracks_fts(tracks_fts, rowid, title, artist, energy) "
+    "VALUES ('delete', old.id, old.title, old.artist, old.energy); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_fts_au AFTER UPDATE OF title, artist, energy ON tracks BEGIN "
+    "INSERT INTO tracks_fts(tracks_fts, rowid, title, artist, energy) "
+    "VALUES ('delete', old.id, old.title, old.artist, old.energy); "
+    "INSERT INTO tracks_fts(rowid, title, artist, energy) VALUES (new.id, new.title, new.artist, new.energy); "
+    "END",
+)
+
+_POSTGRES_DDL = (
+    "ALTER TABLE tracks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(artist, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(energy, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_tracks_search_vector ON tracks USING GIN (search_vector)",
+)
+
+
+def install(connection):
+    name = connection.dialect.name
+    statements = _SQLITE_DDL if name == "sqlite" else _POSTGRES_DDL if name == "postgresql" else ()
+    for stmt in statements:
+        connection.exec_driver_sql(stmt)
+
+
+def rebuild():
+    connection = db.session.connection()
+    install(connection)
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("INSERT INTO tracks_fts(tracks_fts) VALUES ('rebuild')")
+    elif connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("REINDEX INDEX ix_tracks_search_vector")
+    db.session.commit()
+
+
+@event.listens_for(Track.__table__, "after_create")
+def _after_create(target, connection, **kw):
+    install(connection)
+
+
+@event.listens_for(Track.__table__, "before_drop")
+def _before_drop(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS tracks_fts")
+
+
+def parse_query(q):
+    terms = []
+    for field, word in _TERM.findall(q or ""):
+        field = field.lower()
+        if field and field not in FIELDS:
+            terms.append((None, field))
+            field = None
+        terms.append((field or None, word.lower()))
+    return terms
+
+
+def _sqlite_match(terms):
+    return " ".join(f'{field} : "{word}"*' if field else f'"{word}"*' for field, word in terms)
+
+
+def _postgres_tsquery(terms):
+    return " & ".join(f"{word}:*{_PG_WEIGHTS[field]}" if field else f"{word}:*" for field, word in terms)
+
+
+def apply_search(query, q, ranked=True):
+    terms = parse_query(q)
+    if not terms:
+        return query.order_by(Track.id.desc()) if ranked else query
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        fts = table("tracks_fts", column("rowid"), column("rank"))
+        query = query.join(fts, fts.c.rowid == Track.id).filter(
+            text("tracks_fts MATCH :match").bindparams(match=_sqlite_match(terms))
+        )
+        return query.order_by(fts.c.rank, Track.id.desc()) if ranked else query
+
+    if dialect == "postgresql":
+        vector = literal_column("tracks.search_vector")
+        tsquery = func.to_tsquery("simple", _postgres_tsquery(terms))
+        query = query.filter(vector.op("@@")(tsquery))
+        return query.order_by(func.ts_rank(vector, tsquery).desc(), Track.id.desc()) if ranked else query
+
+    for field, word in terms:
+        like = f"%{word}%"
+        columns = [getattr(Track, field)] if field else [Track.title, Track.artist, Track.energy]
+        query = query.filter(or_(*(c.ilike(like) for c in columns)))
+    return query.order_by(Track.id.desc()) if ranked else query
+
+
+@click.command("search-rebuild")
+@with_appcontext
+def rebuild_command():
+    """Create the track search index if missing and backfill it from the tracks table."""
+    rebuild()
+    click.echo("Track search index rebuilt.")
@@ -0,0 +1,111 @@
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import load_only
+from .models import Gig, Set, SetItem, Track, dump_fields
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+try:
+    import msgpack
+except ModuleNotFoundError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+RESOURCES = {
+    "track": (Track, Track.FIELDS),
+    "gig": (Gig, Gig.FIELDS),
+    "set": (Set, (*Set.FIELDS, "items")),
+    "item": (SetItem, SetItem.FIELDS),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def response_mimetype():
+    """The representation negotiated from the request's Accept header."""
+    if not has_request_context() or msgpack is None:
+        return JSON
+    return request.accept_mimetypes.best_match([JSON, MSGPACK], default=JSON)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson for JSON bodies (falls back to the stdlib encoder), msgpack when the client asks for it."""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        mimetype = response_mimetype()
+        if mimetype == MSGPACK:
+            body = msgpack.packb(obj, default=self.default)
+        elif orjson is not None:
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = super().dumps(obj) + "\n"
+        response = self._app.response_class(body, mimetype=mimetype)
+        response.vary.add("Accept")
+        return response
+
+
+def sparse_fields(kind, primary=False):
+    """Fields requested with fields[kind]= (or plain fields= for the endpoint's primary resource).
+
+    Returns None when the client asked for everything; "id" is always included.
+    """
+    raw = request.args.get(f"fields[{kind}]")
+    if raw is None and primary:
+        raw = request.args.get("fields")
+    if raw is None:
+        return None
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    allowed = RESOURCES[kind][1]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise InvalidFields(f"unknown {kind} fields: {', '.join(unknown)}")
+    return ("id", *dict.fromkeys(name for name in names if name != "id"))
+
+
+def _columns(kind, names):
+    model = RESOURCES[kind][0]
+    columns = {attr.key for attr in model.__mapper__.column_attrs}
+    return [getattr(model, name) for name in dict.fromkeys(names) if name in columns]
+
+
+def select_fields(query, kind, fields, *extra):
+    """Narrow a list query to plain rows of the requested columns (plus `extra` the query needs).
+
+    Rows skip ORM identity tracking entirely, which is most of the cost of large lists.
+    """
+    return query.with_entities(*_columns(kind, (*fields, *extra)))
+
+
+def dump(obj, fields=None):
+    """A model's to_dict(), or only `fields` for rows from select_fields()."""
+    return dump_fields(obj, fields) if fields else obj.to_dict()
+
+
+def load_columns(kind, fields, *extra):
+    """load_only() for the columns behind `fields` plus any `extra` the query itself needs."""
+    return load_only(*_columns(kind, (*fields, *extra)))
+
+
+def init_serialization(app):
+    app.json = FastJSONProvider(app)
+
+    @app.errorhandler(InvalidFields)
+    def invalid_fields(err):
+        return {"error": str(err)}, 400
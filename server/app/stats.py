@@ -0,0 +1,86 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, or_, select, update
+from . import db
+from .changes import Change, on_record, record
+from .models import Gig, Set, SetItem, Track
+
+
+def _stats_values():
+    """Correlated aggregates for one tracks row: plays are items in sets attached to a gig."""
+    played = (
+        select(SetItem.id)
+        .join(Set, SetItem.set_id == Set.id)
+        .where(SetItem.track_id == Track.id, Set.gig_id.isnot(None))
+    )
+    return {
+        "play_count": select(func.count()).select_from(played.subquery()).scalar_subquery(),
+        "set_count": select(func.count(SetItem.set_id.distinct())).where(SetItem.track_id == Track.id).scalar_subquery(),
+        "last_played": (
+            select(func.max(Gig.gig_date))
+            .join(Set, Set.gig_id == Gig.id)
+            .join(SetItem, SetItem.set_id == Set.id)
+            .where(SetItem.track_id == Track.id)
+            .scalar_subquery()
+        ),
+    }
+
+
+def refresh(connection, where=None, returning=False):
+    """Recompute stats for the tracks matching `where`, or for every track.
+
+    With `returning`, the (id, user_id) of every updated track is returned.
+    """
+    stmt = update(Track).values(**_stats_values())
+    if where is not None:
+        stmt = stmt.where(where)
+    if returning:
+        return connection.execute(stmt.returning(Track.id, Track.user_id)).all()
+    connection.execute(stmt)
+
+
+def affected_tracks(changes):
+    """WHERE clause for the tracks whose stats `changes` can move, or None."""
+    track_ids, set_ids, gig_ids = set(), set(), set()
+    for change in changes:
+        if change.entity == "set_item" and change.op in ("create", "delete") and change.values:
+            track_ids.add(change.values["track_id"])
+        elif change.entity == "set" and change.op == "update":
+            set_ids.add(change.id)
+        elif change.entity == "gig" and change.op == "update":
+            gig_ids.add(change.id)
+
+    where = []
+    if track_ids:
+        where.append(Track.id.in_(track_ids))
+    if set_ids or gig_ids:
+        sets = [Set.id.in_(set_ids)] if set_ids else []
+        if gig_ids:
+            sets.append(Set.gig_id.in_(gig_ids))
+        where.append(Track.id.in_(
+            select(SetItem.track_id).join(Set, SetItem.set_id == Set.id).where(or_(*sets))
+        ))
+    return or_(*where) if where else None
+
+
+@on_record
+def _refresh_affected(db_session, changes):
+    """Only tracks whose items, sets or gigs changed are recomputed, inside the writing transaction.
+
+    The recomputed tracks are recorded as updates, so their ETags, cached responses and the sets
+    that contain them follow the new stats.
+    """
+    where = affected_tracks(changes)
+    if where is not None:
+        touched = refresh(db_session.connection(), where, returning=True)
+        if touched:
+            record(db_session, *(Change("track", "update", track_id, user_id, None, None) for track_id, user_id in touched))
+
+
+@click.command("stats-rebuild")
+@with_appcontext
+def rebuild_command():
+    """Recompute play statistics for every track."""
+    refresh(db.session.connection())
+    db.session.commit()
+    click.echo("Track play statistics rebuilt.")
@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from flask import current_app, has_app_context
+from . import db
+from .changes import on_commit
+from .harmony import features, transition_scores
+from .models import SyncLog, Track
+from .versioning import user_version
+
+MAX_CACHED_LIBRARIES = 32
+MAX_CATCH_UP_TRACKS = 1000
+
+_FIELDS = ("bpm", "num", "letter", "energy")
+
+
+class LibraryIndex:
+    """Column arrays of a user's library, updated in place as tracks change.
+
+    `version` is the user's data version the arrays are known to reflect.
+    """
+
+    def __init__(self, rows, version=None):
+        rows = list(rows)
+        self.lock = threading.Lock()
+        self.version = version
+        self.size = len(rows)
+        capacity = max(64, self.size)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.ids[: self.size] = [row[0] for row in rows]
+        self.columns = {}
+        for name, values in features(row[1:] for row in rows).items():
+            column = np.zeros(capacity, dtype=values.dtype)
+            column[: self.size] = values
+            self.columns[name] = column
+        self.slots = {track_id: slot for slot, track_id in enumerate(self.ids[: self.size].tolist())}
+
+    def upsert(self, track_id, bpm, musical_key, energy):
+        values = features([(bpm, musical_key, energy)])
+        with self.lock:
+            slot = self.slots.get(track_id)
+            if slot is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                slot = self.slots[track_id] = self.size
+                self.size += 1
+                self.ids[slot] = track_id
+            for name in _FIELDS:
+                self.columns[name][slot] = values[name][0]
+
+    def remove(self, track_id):
+        with self.lock:
+            slot = self.slots.pop(track_id, None)
+            if slot is None:
+                return
+            last = self.size - 1
+            if slot != last:
+                self.ids[slot] = self.ids[last]
+                for column in self.columns.values():
+                    column[slot] = column[last]
+                self.slots[int(self.ids[slot])] = slot
+            self.size = last
+
+    def _grow(self):
+        self.ids = np.resize(self.ids, len(self.ids) * 2)
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, len(column) * 2)
+
+    def reference(self, track_id):
+        with self.lock:
+            slot = self.slots.get(track_id)
+            if slot is None:
+                return None
+            return {name: column[slot] for name, column in self.columns.items()}
+
+    def top(self, ref, limit, exclude=()):
+        with self.lock:
+            ids = self.ids[: self.size]
+            dst = {name: column[: self.size] for name, column in self.columns.items()}
+            total, parts = transition_scores(ref, dst)
+            total = np.where(np.isin(ids, list(exclude)), -1.0, total)
+            k = min(limit, self.size)
+            if k == 0:
+                return []
+            best = np.argpartition(-total, k - 1)[:k]
+            best = best[np.argsort(-total[best], kind="stable")]
+            return [
+                (int(ids[i]), float(total[i]), {name: float(part[i]) for name, part in parts.items()})
+                for i in best
+                if total[i] >= 0
+            ]
+
+
+class IndexCache:
+    def __init__(self, maxsize=MAX_CACHED_LIBRARIES):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def peek(self, user_id):
+        with self._lock:
+            return self._indexes.get(user_id)
+
+    def get(self, user_id):
+        """The user's index, brought up to their current data version.
+
+        Other workers' writes never reach this process's commit listener, so a cached index whose
+        version is behind replays the tracks the sync log shows changed since then, and is rebuilt
+        only when more than MAX_CATCH_UP_TRACKS did.
+        """
+        version = user_version(user_id)
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+        if index is not None and (index.version == version or _catch_up(index, user_id, version)):
+            return index
+
+        rows = db.session.query(Track.id, Track.bpm, Track.musical_key, Track.energy).filter_by(user_id=user_id).all()
+        index = LibraryIndex(rows, version)
+        with self._lock:
+            self._indexes[user_id] = index
+            while len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+
+def _catch_up(index, user_id, version):
+    # A write that raced the build was logged at or after the version read then, hence >=.
+    changed = {
+        track_id
+        for (track_id,) in db.session.query(SyncLog.entity_id)
+        .filter(SyncLog.user_id == user_id, SyncLog.entity == "track", SyncLog.version >= (index.version or 0))
+        .distinct()
+        .limit(MAX_CATCH_UP_TRACKS + 1)
+    }
+    if len(changed) > MAX_CATCH_UP_TRACKS:
+        return False
+    found = set()
+    if changed:
+        rows = db.session.query(Track.id, Track.bpm, Track.musical_key, Track.energy).filter(
+            Track.user_id == user_id, Track.id.in_(changed)
+        )
+        for track_id, bpm, musical_key, energy in rows:
+            found.add(track_id)
+            index.upsert(track_id, bpm, musical_key, energy)
+    for track_id in changed - found:
+        index.remove(track_id)
+    index.version = version
+    return True
+
+
+def index_cache():
+    return current_app.extensions.setdefault("suggestion_indexes", IndexCache())
+
+
+@on_commit
+def _apply_track_changes(changes):
+    if not has_app_context() or "suggestion_indexes" not in current_app.extensions:
+        return
+    cache = current_app.extensions["suggestion_indexes"]
+    for change in changes:
+        if change.entity != "track":
+            continue
+        index = cache.peek(change.user_id)
+        if index is None:
+            continue
+        if change.op == "bulk":
+            cache.invalidate(change.user_id)
+        elif change.op == "delete":
+            index.remove(change.id)
+        elif change.values is not None:
+            v = change.values
+            index.upsert(change.id, v["bpm"], v["musical_key"], v["energy"])
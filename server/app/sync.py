@@ -0,0 +1,90 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func, insert, select, tuple_
+from . import db
+from .changes import on_record
+from .models import Gig, Set, SetItem, SyncLog, Track, User
+from .pagination import decode_cursor, encode_cursor
+from .versioning import user_version
+
+ENTITIES = {"gig": Gig, "track": Track, "set": Set, "set_item": SetItem}
+
+
+def encode_token(version, log_id):
+    return encode_cursor("sync", [version, log_id])
+
+
+def decode_token(token):
+    return decode_cursor(token, "sync", 2)
+
+
+def current_token(user_id):
+    """Token for the user's latest logged write, so a client that just loaded everything syncs from here."""
+    last = (
+        db.session.query(SyncLog.version, SyncLog.id)
+        .filter(SyncLog.user_id == user_id)
+        .order_by(SyncLog.version.desc(), SyncLog.id.desc())
+        .first()
+    )
+    return encode_token(*last) if last else encode_token(user_version(user_id) or 0, 0)
+
+
+def changes_since(user_id, since, limit):
+    """Log rows after `since`, collapsed to the last op per entity.
+
+    Returns ({entity: {id: op}}, next token, has_more). The scan walks the (user_id, version, id)
+    index from the token, so it reads only the rows written since then.
+    """
+    rows = (
+        db.session.query(SyncLog.version, SyncLog.id, SyncLog.entity, SyncLog.entity_id, SyncLog.op)
+        .filter(SyncLog.user_id == user_id, tuple_(SyncLog.version, SyncLog.id) > tuple_(*since))
+        .order_by(SyncLog.version, SyncLog.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {entity: {} for entity in ENTITIES}
+    for _, _, entity, entity_id, op in rows:
+        latest[entity][entity_id] = op
+    token = encode_token(rows[-1].version, rows[-1].id) if rows else encode_token(*since)
+    return latest, token, has_more
+
+
+def load_current(user_id, entity, ids):
+    model = ENTITIES[entity]
+    query = db.session.query(model).filter(model.id.in_(ids))
+    if model is SetItem:
+        return query.join(Set, SetItem.set_id == Set.id).filter(Set.user_id == user_id).all()
+    return query.filter(model.user_id == user_id).all()
+
+
+@on_record
+def _log(db_session, changes):
+    """Append the changes to the sync log under the data version this write bumped the user to."""
+    rows = []
+    for change in changes:
+        if change.user_id is None:
+            continue
+        if change.op == "bulk":
+            ids = (change.values or {}).get("ids", ())
+            rows.extend((change.user_id, change.entity, entity_id, "create") for entity_id in ids)
+        else:
+            rows.append((change.user_id, change.entity, change.id, change.op))
+
+    if rows:
+        version = select(User.data_version).where(User.id == bindparam("owner")).scalar_subquery()
+        db_session.connection().execute(insert(SyncLog).values(version=version), [
+            {"owner": user_id, "user_id": user_id, "entity": entity, "entity_id": entity_id, "op": op}
+            for user_id, entity, entity_id, op in rows
+        ])
+
+
+@click.command("sync-compact")
+@with_appcontext
+def compact_command():
+    """Drop sync log rows superseded by a later write to the same entity."""
+    keep = select(func.max(SyncLog.id)).group_by(SyncLog.user_id, SyncLog.entity, SyncLog.entity_id)
+    result = db.session.execute(SyncLog.__table__.delete().where(SyncLog.id.notin_(keep)))
+    db.session.commit()
+    click.echo(f"Removed {result.rowcount} superseded sync log rows.")
@@ -0,0 +1,74 @@
+import hashlib
+from functools import wraps
+from flask import make_response, request, session
+from sqlalchemy import or_, select, update
+from . import db
+from .changes import on_record
+from .models import Set, SetItem, User
+from .serialization import response_mimetype
+
+
+def user_version(user_id):
+    return db.session.query(User.data_version).filter_by(id=user_id).scalar()
+
+
+def set_version(set_id, user_id):
+    return db.session.query(Set.version).filter_by(id=set_id, user_id=user_id).scalar()
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def etagged(view=None, vary=None):
+    """Answer If-None-Match from the user's (or, for set routes, the set's) version before the view runs.
+
+    `vary()` returns anything else the response depends on, such as today's date, to fold into the ETag.
+    """
+    if view is None:
+        return lambda view: etagged(view, vary)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = session["user_id"]
+        if "set_id" in kwargs:
+            version = set_version(kwargs["set_id"], user_id)
+            if version is None:
+                return {"error": "Not found"}, 404
+        else:
+            version = user_version(user_id)
+
+        etag = make_etag(
+            request.endpoint, user_id, version, sorted(request.args.items(multi=True)), response_mimetype(),
+            vary() if vary else None,
+        )
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+            response.set_etag(etag)
+            response.vary.add("Accept")
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+
+    return wrapper
+
+
+@on_record
+def _bump_versions(db_session, changes):
+    user_ids = {c.user_id for c in changes if c.user_id is not None}
+    set_ids = {c.set_id for c in changes if c.set_id is not None}
+    track_ids = {c.id for c in changes if c.entity == "track" and c.op in ("update", "delete")}
+
+    connection = db_session.connection()
+    if user_ids:
+        connection.execute(
+            update(User).where(User.id.in_(user_ids)).values(data_version=User.data_version + 1)
+        )
+    if set_ids or track_ids:
+        containing = select(SetItem.set_id).where(SetItem.track_id.in_(track_ids))
+        connection.execute(
+            update(Set).where(or_(Set.id.in_(set_ids), Set.id.in_(containing))).values(version=Set.version + 1)
+        )
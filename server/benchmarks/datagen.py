@@ -0,0 +1,120 @@
+"""Deterministic seeded library generator for benchmarks.
+
+Every run with the same arguments produces byte-identical rows (ids included), so results from
+different commits are comparable.
+"""
+import random
+from datetime import date, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app import db
+from app.duplicates import fingerprint
+from app.models import Gig, Set, SetItem, Track, User
+from app.stats import refresh
+
+PASSWORD = "benchmark-password"
+KEYS = [f"{n}{letter}" for n in range(1, 13) for letter in "AB"]
+ENERGY = ["warmup", "build", "groove", "peak", "closer", "1", "3", "5", "7", "9"]
+WORDS = [
+    "acid", "after", "analog", "aurora", "bass", "blue", "burn", "city", "cloud", "crystal", "dawn", "deep",
+    "dream", "drive", "echo", "electric", "ember", "fever", "flight", "floor", "gold", "gravity", "haze",
+    "heart", "horizon", "jack", "late", "light", "liquid", "lost", "loop", "lunar", "midnight", "motion",
+    "neon", "night", "ocean", "pulse", "rain", "rise", "rhythm", "signal", "silk", "solar", "soul", "static",
+    "storm", "summer", "system", "tide", "velvet", "wave", "wild",
+]
+BATCH = 5000
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows):
+    for batch in _batches(rows):
+        db.session.execute(insert(model), batch)
+
+
+def generate(users=1, tracks=1000, sets=20, set_sizes=(10, 50, 200), gigs=50, years=5, seed=1):
+    """Seed the current app's database and return a summary with the ids benchmarks need."""
+    rng = random.Random(seed)
+    pwhash = generate_password_hash(PASSWORD, "pbkdf2:sha256:1000")
+    artists = [f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}" for _ in range(max(50, tracks // 20))]
+    first_day = date(2026, 1, 1) - timedelta(days=365 * years)
+
+    summary = {"users": []}
+    track_id = gig_id = set_id = item_id = 0
+    for u in range(1, users + 1):
+        db.session.execute(insert(User), [{"id": u, "username": f"DJ {u}", "email": f"dj{u}@example.com", "password_hash": pwhash}])
+
+        first_track = track_id + 1
+        rows = []
+        for _ in range(tracks):
+            track_id += 1
+            title = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {track_id}"
+            artist = rng.choice(artists)
+            rows.append({
+                "id": track_id,
+                "user_id": u,
+                "title": title,
+                "artist": artist,
+                "fingerprint": fingerprint(artist, title),
+                "bpm": rng.randint(70, 175) if rng.random() > 0.05 else None,
+                "musical_key": rng.choice(KEYS) if rng.random() > 0.1 else None,
+                "energy": rng.choice(ENERGY),
+                "notes": "crowd favourite" if rng.random() < 0.02 else None,
+            })
+        _insert(Track, rows)
+        last_track = track_id
+
+        first_gig = gig_id + 1
+        rows = []
+        for _ in range(gigs):
+            gig_id += 1
+            rows.append({
+                "id": gig_id,
+                "user_id": u,
+                "title": f"{rng.choice(WORDS).title()} Night",
+                "venue": f"{rng.choice(WORDS).title()} Club",
+                "gig_date": first_day + timedelta(days=rng.randrange(365 * years)),
+            })
+        _insert(Gig, rows)
+
+        set_rows, item_rows = [], []
+        largest = None
+        for n in range(sets):
+            set_id += 1
+            size = set_sizes[n % len(set_sizes)]
+            set_rows.append({
+                "id": set_id,
+                "user_id": u,
+                "gig_id": rng.randint(first_gig, gig_id) if gigs and rng.random() < 0.8 else None,
+                "name": f"Set {set_id}",
+            })
+            picks = [first_track] + rng.sample(range(first_track + 1, last_track + 1), min(size - 1, tracks - 1))
+            for position, picked in enumerate(picks):
+                item_id += 1
+                item_rows.append({"id": item_id, "set_id": set_id, "track_id": picked, "position": position * 1024})
+            if largest is None or size > largest[1]:
+                largest = (set_id, size)
+        _insert(Set, set_rows)
+        _insert(SetItem, item_rows)
+
+        summary["users"].append({
+            "id": u,
+            "email": f"dj{u}@example.com",
+            "hot_track_id": first_track,
+            "largest_set_id": largest[0] if largest else None,
+            "largest_set_size": largest[1] if largest else 0,
+        })
+
+    refresh(db.session.connection())
+    db.session.commit()
+    summary["totals"] = {"tracks": track_id, "gigs": gig_id, "sets": set_id, "set_items": item_id}
+    return summary
@@ -0,0 +1,132 @@
+"""Read throughput while a writer is busy, per database engine profile.
+
+Seeds a file-backed SQLite library, then runs N reader threads (GET /api/tracks?limit=50 and
+GET /api/sets/:id) alongside one writer thread (POST/PATCH /api/tracks) for a fixed duration,
+once with DB_PROFILE=default (rollback journal) and once with DB_PROFILE=tuned (WAL + pragmas).
+
+    python benchmarks/db_concurrency.py --readers 1,4,8 --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from datagen import PASSWORD, generate
+
+
+def build_app(db_path, profile):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "METRICS_ENABLED": False,
+        "CACHE_BACKEND": "none",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "DB_PROFILE": profile,
+        "SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": 32, "max_overflow": 0},
+    })
+
+
+def login(app, email):
+    client = app.test_client()
+    r = client.post("/api/login", json={"email": email, "password": PASSWORD})
+    if r.status_code != 200:
+        raise RuntimeError(f"login failed: {r.status_code}")
+    return client
+
+
+def run(app, summary, readers, seconds):
+    user = summary["users"][0]
+    stop = threading.Event()
+    reads, writes, errors = [], [], []
+
+    def reader(n):
+        client = login(app, user["email"])
+        paths = ["/api/tracks?limit=50", f"/api/sets/{user['largest_set_id']}"]
+        i = n
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                r = client.get(paths[i % 2])
+                ok = r.status_code == 200
+            except Exception as exc:
+                ok = False
+                errors.append(type(exc).__name__)
+            if ok:
+                reads.append(time.perf_counter() - started)
+            i += 1
+
+    def writer():
+        client = login(app, user["email"])
+        i = 0
+        while not stop.is_set():
+            try:
+                if i % 2:
+                    r = client.patch(f"/api/tracks/{user['hot_track_id']}", json={"notes": f"edit {i}"})
+                else:
+                    r = client.post("/api/tracks", json={"title": f"New {i}", "artist": "Writer"})
+                if r.status_code < 300:
+                    writes.append(i)
+            except Exception as exc:
+                errors.append(type(exc).__name__)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    reads.sort()
+    pick = lambda q: round(reads[min(len(reads) - 1, int(q * len(reads)))] * 1000, 1) if reads else None
+    return {
+        "readers": readers,
+        "reads_per_sec": round(len(reads) / seconds, 1),
+        "writes_per_sec": round(len(writes) / seconds, 1),
+        "read_p50_ms": pick(0.5),
+        "read_p95_ms": pick(0.95),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default="default,tuned")
+    parser.add_argument("--readers", default="1,4,8", help="comma-separated reader thread counts")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tracks", type=int, default=20000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for profile in args.profiles.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = build_app(os.path.join(tmp, "bench.db"), profile)
+            with app.app_context():
+                db.create_all()
+                summary = generate(tracks=args.tracks, sets=10, set_sizes=(50, 200))
+            for readers in [int(r) for r in args.readers.split(",")]:
+                row = {"profile": profile, **run(app, summary, readers, args.seconds)}
+                results.append(row)
+                print(
+                    f"profile={profile:<8} readers={readers:<3} {row['reads_per_sec']:>8} reads/s "
+                    f"{row['writes_per_sec']:>7} writes/s p50={row['read_p50_ms']}ms p95={row['read_p95_ms']}ms "
+                    f"errors={row['errors']}"
+                )
+            with app.app_context():
+                db.engine.dispose()
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Endpoint latency, query-count and memory benchmarks on seeded libraries.
+
+Builds a throwaway SQLite database per library size with benchmarks/datagen.py, then drives the
+hot endpoints through the Flask test client and records latency percentiles, SQL statements per
+request and peak traced allocation per request. Results can be written as JSON and compared with
+a stored baseline; any regression makes the script exit non-zero.
+
+    python benchmarks/endpoints.py --tracks 1000,50000 --json results.json
+    python benchmarks/endpoints.py --tracks 1000,50000 --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models import SetItem
+from datagen import PASSWORD, generate
+
+
+def build_app(db_path):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "METRICS_ENABLED": False,
+        "CACHE_BACKEND": "none",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    })
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def scenarios(app, user):
+    """(name, method, path, body factory) for every measured request."""
+    with app.app_context():
+        set_id = user["largest_set_id"]
+        item_ids = [i for (i,) in db.session.query(SetItem.id).filter_by(set_id=set_id).order_by(SetItem.position)]
+
+    def reorder_body(n):
+        return {"order": item_ids[::-1] if n % 2 == 0 else item_ids}
+
+    return [
+        ("list_tracks", "GET", "/api/tracks?limit=50", None),
+        ("list_tracks_by_title", "GET", "/api/tracks?limit=50&sort=title", None),
+        ("list_tracks_search", "GET", "/api/tracks?limit=50&q=night", None),
+        ("list_tracks_total", "GET", "/api/tracks?limit=50&include_total=1", None),
+        ("get_set", "GET", f"/api/sets/{set_id}", None),
+        ("reorder_items", "PUT", f"/api/sets/{set_id}/items/reorder", reorder_body),
+        ("track_usage", "GET", f"/api/tracks/{user['hot_track_id']}/usage", None),
+    ]
+
+
+def measure(client, counter, method, path, body, iterations, warmup):
+    def call(n):
+        r = client.open(path, method=method, json=body(n) if body else None)
+        if r.status_code >= 400:
+            raise RuntimeError(f"{method} {path} -> {r.status_code}: {r.get_data(as_text=True)[:200]}")
+
+    for n in range(warmup):
+        call(n)
+
+    counter.count = 0
+    latencies = []
+    for n in range(warmup, warmup + iterations):
+        started = time.perf_counter()
+        call(n)
+        latencies.append(time.perf_counter() - started)
+    queries = counter.count / iterations
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        call(warmup + iterations)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "queries": round(queries, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(tracks, args):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            summary = generate(
+                users=args.users,
+                tracks=tracks,
+                sets=args.sets,
+                set_sizes=[int(s) for s in args.set_sizes.split(",")],
+                gigs=args.gigs,
+                years=args.years,
+                seed=args.seed,
+            )
+            print(f"seeded {summary['totals']} in {time.perf_counter() - started:.1f}s")
+            counter = QueryCounter(db.engine)
+
+        user = summary["users"][0]
+        client = app.test_client()
+        r = client.post("/api/login", json={"email": user["email"], "password": PASSWORD})
+        if r.status_code != 200:
+            raise RuntimeError(f"login failed: {r.status_code}")
+
+        for name, method, path, body in scenarios(app, user):
+            row = measure(client, counter, method, path, body, args.iterations, args.warmup)
+            results[f"{name}@{tracks}"] = row
+            print(
+                f"{name:<22} tracks={tracks:<7} p50={row['p50_ms']:>8}ms p95={row['p95_ms']:>8}ms "
+                f"p99={row['p99_ms']:>8}ms queries={row['queries']:<6} peak={row['peak_kib']}KiB"
+            )
+        with app.app_context():
+            db.engine.dispose()
+    return results
+
+
+def compare(results, baseline, tolerance, min_ms):
+    """Return a list of human-readable regressions against a baseline results file."""
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        row = results.get(key)
+        if row is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if row[metric] > base[metric] * (1 + tolerance) and row[metric] - base[metric] > min_ms:
+                regressions.append(f"{key}: {metric} {base[metric]} -> {row[metric]}")
+        if row["queries"] > base["queries"]:
+            regressions.append(f"{key}: queries {base['queries']} -> {row['queries']}")
+        if row["peak_kib"] > base["peak_kib"] * (1 + tolerance):
+            regressions.append(f"{key}: peak_kib {base['peak_kib']} -> {row['peak_kib']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", default="1000,10000", help="comma-separated library sizes (tracks per user)")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--sets", type=int, default=20)
+    parser.add_argument("--set-sizes", default="10,100,500", help="comma-separated item counts cycled across sets")
+    parser.add_argument("--gigs", type=int, default=200)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a results file written by --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown before flagging")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    results = {}
+    for tracks in [int(t) for t in args.tracks.split(",")]:
+        results.update(run(tracks, args))
+
+    output = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(output, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance, args.min_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
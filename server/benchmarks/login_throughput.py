@@ -0,0 +1,105 @@
+"""Login throughput under concurrency.
+
+Seeds a throwaway SQLite database with users, then fires logins from N client threads through
+the Flask test client and reports logins/sec and latency percentiles for each hashing pool size.
+
+    python benchmarks/login_throughput.py --method scrypt --workers 1,4 --concurrency 1,8,32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import User
+from app.passwords import password_hasher
+
+PASSWORD = "benchmark-password"
+
+
+def build_app(db_path, method, workers):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "METRICS_ENABLED": False,
+        "CACHE_BACKEND": "none",
+        "PASSWORD_HASH_METHOD": method,
+        "PASSWORD_HASH_WORKERS": workers,
+        "LOGIN_MAX_FAILURES_PER_IP": 10**9,
+    })
+    return app
+
+
+def seed(app, users):
+    with app.app_context():
+        db.create_all()
+        pwhash = password_hasher().hash(PASSWORD)
+        db.session.execute(
+            User.__table__.insert(),
+            [{"username": f"dj{i}", "email": f"dj{i}@example.com", "password_hash": pwhash} for i in range(users)],
+        )
+        db.session.commit()
+
+
+def run(app, users, concurrency, total):
+    def one(_):
+        client = app.test_client()
+        email = f"dj{random.randrange(users)}@example.com"
+        started = time.perf_counter()
+        r = client.post("/api/login", json={"email": email, "password": PASSWORD})
+        return r.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for status, latency in results if status == 200)
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else None
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "busy": sum(1 for status, _ in results if status == 503),
+        "logins_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", default="scrypt")
+    parser.add_argument("--workers", default="1,4", help="comma-separated hashing pool sizes")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated client thread counts")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = build_app(os.path.join(tmp, "bench.db"), args.method, workers)
+            seed(app, args.users)
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                row = {"method": args.method, "hash_workers": workers, **run(app, args.users, concurrency, args.requests)}
+                results.append(row)
+                print(
+                    f"workers={workers:<3} concurrency={concurrency:<4} {row['logins_per_sec']:>8} logins/s "
+                    f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms busy={row['busy']}"
+                )
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
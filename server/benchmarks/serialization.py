@@ -0,0 +1,106 @@
+"""Payload size and encode time for large track lists.
+
+Seeds a library with benchmarks/datagen.py and encodes the full track list with each encoder
+(stdlib json, orjson, msgpack), with and without a sparse fieldset.
+
+    python benchmarks/serialization.py --tracks 10000,100000 --fields id,title,artist,bpm
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+import orjson
+from app import create_app, db
+from app.models import Track
+from app.serialization import dump, select_fields
+from datagen import generate
+
+ENCODERS = {
+    "json": lambda obj: json.dumps(obj, separators=(",", ":")).encode(),
+    "orjson": orjson.dumps,
+    "msgpack": msgpack.packb,
+}
+
+
+def build_app(db_path):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "METRICS_ENABLED": False,
+        "CACHE_BACKEND": "none",
+    })
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def run(tracks, fields, repeat):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            generate(tracks=tracks, sets=1, set_sizes=(10,), gigs=10)
+            for label, selected in (("full", None), ("sparse", fields)):
+                query = Track.query.order_by(Track.id)
+                if selected:
+                    query = select_fields(query, "track", selected)
+
+                def load():
+                    db.session.expunge_all()
+                    return query.all()
+
+                load_s, objects = best_of(load, repeat)
+                payload = {"tracks": [dump(t, selected) for t in objects]}
+                for name, encode in ENCODERS.items():
+                    seconds, body = best_of(lambda: encode(payload), repeat)
+                    rows.append({
+                        "tracks": tracks,
+                        "fields": label,
+                        "encoder": name,
+                        "bytes": len(body),
+                        "gzip_bytes": len(gzip.compress(body, 6)),
+                        "encode_ms": round(seconds * 1000, 2),
+                        "load_ms": round(load_s * 1000, 2),
+                    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", default="10000,100000", help="comma-separated library sizes")
+    parser.add_argument("--fields", default="id,title,artist,bpm", help="sparse fieldset to compare with the full one")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    fields = ("id", *(f for f in args.fields.split(",") if f and f != "id"))
+    results = []
+    for tracks in [int(t) for t in args.tracks.split(",")]:
+        for row in run(tracks, fields, args.repeat):
+            results.append(row)
+            print(
+                f"tracks={row['tracks']:<7} {row['fields']:<6} {row['encoder']:<8} {row['bytes']:>11} B "
+                f"gzip={row['gzip_bytes']:>10} B encode={row['encode_ms']:>8}ms load={row['load_ms']}ms"
+            )
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
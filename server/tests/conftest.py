@@ -1,6 +1,8 @@
 import os
 import sys
+from contextlib import contextmanager
 import pytest
+from sqlalchemy import event
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
@@ -12,6 +14,7 @@ def app():
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite://",
         "SECRET_KEY": "test-secret",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
     })
     with app.app_context():
         db.create_all()
@@ -22,3 +25,22 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+@pytest.fixture()
+def assert_max_queries(app):
+    @contextmanager
+    def checker(limit, only=None):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if only is None or statement.lstrip().upper().startswith(only):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        assert len(statements) <= limit, f"{len(statements)} queries (limit {limit}):\n" + "\n".join(statements)
+
+    return checker
@@ -1,3 +1,6 @@
+from app import db
+from app.models import User
+
 def signup(client, username="Lani", email="lani@example.com", password="password1"):
     return client.post("/api/signup", json={"username": username, "email": email, "password": password})
 
@@ -27,3 +30,61 @@ def test_signup_login_logout_flow(client):
 
     r = login(client)
     assert r.status_code == 200
+
+def test_authenticated_requests_do_not_load_the_user_row(client, assert_max_queries):
+    signup(client)
+    gig = client.post("/api/gigs", json={"title": "Gig"}).get_json()
+
+    with assert_max_queries(0):
+        r = client.get("/api/me")
+    assert r.get_json()["email"] == "lani@example.com"
+
+    with assert_max_queries(2, only="SELECT") as queries:
+        r = client.patch(f"/api/gigs/{gig['id']}", json={"venue": "Club"})
+    assert r.status_code == 200
+    assert not any("FROM users" in q for q in queries)
+
+def test_legacy_session_payload_is_upgraded_once(client, assert_max_queries):
+    r = signup(client)
+    user_id = r.get_json()["id"]
+    with client.session_transaction() as sess:
+        sess.pop("identity")
+        assert sess["user_id"] == user_id
+
+    with assert_max_queries(1):
+        assert client.get("/api/me").status_code == 200
+    with assert_max_queries(0):
+        assert client.get("/api/me").status_code == 200
+
+    logout(client)
+    assert client.get("/api/me").status_code == 401
+
+def test_login_rehashes_outdated_hashes(client):
+    user = User(username="Old", email="old@example.com")
+    user.set_password("password1")
+    db.session.add(user)
+    db.session.commit()
+    assert user.password_hash.startswith("scrypt")
+
+    r = login(client, email="old@example.com")
+    assert r.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert user.check_password("password1")
+
+def test_failed_logins_are_limited_per_account_and_address(client):
+    signup(client)
+    signup(client, username="Other", email="other@example.com")
+    logout(client)
+
+    for _ in range(5):
+        assert login(client, password="wrong-password").status_code == 401
+    r = login(client)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+
+    assert login(client, email="other@example.com").status_code == 200
+
+    owner = client.post("/api/login", json={"email": "lani@example.com", "password": "password1"},
+                        environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert owner.status_code == 200
@@ -0,0 +1,53 @@
+from app.models import Set, Track
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_batch_builds_a_set_with_references_in_one_transaction(client):
+    signup(client)
+    r = client.post("/api/batch", json={"operations": [
+        {"method": "POST", "path": "/sets", "body": {"name": "Friday"}, "ref": "set"},
+        {"method": "POST", "path": "/tracks", "body": {"title": "Opener", "artist": "A"}, "ref": "t1"},
+        {"method": "POST", "path": "/tracks", "body": {"title": "Closer", "artist": "B"}, "ref": "t2"},
+        {"method": "POST", "path": "/sets/$set.id/items", "body": {"track_id": "$t1.id"}, "ref": "i1"},
+        {"method": "POST", "path": "/sets/$set.id/items", "body": {"track_id": "$t2.id"}},
+        {"method": "PATCH", "path": "/sets/$set.id/items/$i1.id", "body": {"notes": "long intro"}},
+    ]})
+    assert r.status_code == 200
+    results = r.get_json()["results"]
+    assert [res["status"] for res in results] == [201, 201, 201, 201, 201, 200]
+    assert results[0]["ref"] == "set"
+
+    s = client.get(f"/api/sets/{results[0]['body']['id']}").get_json()
+    assert [i["track"]["title"] for i in s["items"]] == ["Opener", "Closer"]
+    assert s["items"][0]["notes"] == "long intro"
+
+def test_batch_rolls_back_everything_when_an_operation_fails(client, app):
+    signup(client)
+    r = client.post("/api/batch", json={"operations": [
+        {"method": "POST", "path": "/sets", "body": {"name": "Friday"}, "ref": "set"},
+        {"method": "POST", "path": "/tracks", "body": {"title": "Opener", "artist": "A"}},
+        {"method": "POST", "path": "/sets/$set.id/items", "body": {"track_id": 9999}},
+    ]})
+    assert r.status_code == 404
+    body = r.get_json()
+    assert body["failed"] == 2
+    assert [res["status"] for res in body["results"]] == [201, 201, 404]
+    assert Set.query.count() == 0
+    assert Track.query.count() == 0
+    assert client.get("/api/sets").get_json()["sets"] == []
+
+def test_batch_rejects_reads_foreign_routes_and_bad_references(client):
+    signup(client)
+    assert client.post("/api/batch", json={"operations": [{"method": "GET", "path": "/tracks"}]}).status_code == 400
+
+    r = client.post("/api/batch", json={"operations": [{"method": "DELETE", "path": "/logout"}]})
+    assert r.status_code == 400
+    assert client.get("/api/me").status_code == 200
+
+    r = client.post("/api/batch", json={"operations": [{"method": "POST", "path": "/sets/$nope.id/items", "body": {}}]})
+    assert r.status_code == 400
+    assert "$nope" in r.get_json()["results"][0]["body"]["error"]
+
+def test_batch_requires_login(client):
+    assert client.post("/api/batch", json={"operations": [{"method": "POST", "path": "/sets"}]}).status_code == 401
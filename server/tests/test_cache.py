@@ -0,0 +1,58 @@
+from app.cache import MemoryCache, SQLiteCache
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_hot_reads_are_cached_and_invalidated_precisely(client):
+    signup(client)
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]})
+    client.post("/api/gigs", json={"title": "Gig"})
+
+    for path in ("/api/gigs", f"/api/sets/{s['id']}", "/api/tracks", f"/api/tracks/{t['id']}/usage"):
+        assert client.get(path).headers["X-Cache"] == "MISS"
+        assert client.get(path).headers["X-Cache"] == "HIT"
+    assert "X-Cache" not in client.get("/api/tracks?page=2").headers
+
+    client.patch(f"/api/tracks/{t['id']}", json={"bpm": 124})
+    assert client.get("/api/gigs").headers["X-Cache"] == "HIT"
+    r = client.get(f"/api/sets/{s['id']}")
+    assert r.headers["X-Cache"] == "MISS"
+    assert r.get_json()["items"][0]["track"]["bpm"] == 124
+    assert client.get("/api/tracks").get_json()["tracks"][0]["bpm"] == 124
+
+    client.patch(f"/api/sets/{s['id']}", json={"name": "Renamed"})
+    r = client.get(f"/api/tracks/{t['id']}/usage")
+    assert r.headers["X-Cache"] == "MISS"
+    assert r.get_json()["usage"][0]["set_name"] == "Renamed"
+
+    stats = client.get("/api/cache/stats").get_json()
+    assert stats["backend"] == "memory"
+    assert stats["hits"] >= 4
+    assert stats["invalidations"] >= 3
+
+def test_memory_cache_evicts_by_size_and_skips_stale_writes():
+    cache = MemoryCache(max_bytes=100, ttl=60)
+    cache.set("a", b"x" * 40, ["t1"])
+    cache.set("b", b"x" * 40, ["t2"])
+    cache.get("a")
+    cache.set("c", b"x" * 40, ["t2"])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    seq = cache.sequence()
+    cache.invalidate(["t1"])
+    assert cache.get("a") is None
+    cache.set("a", b"stale", ["t1"], seq=seq)
+    assert cache.get("a") is None
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    one, two = SQLiteCache(path), SQLiteCache(path)
+    one.set("k", b"payload", ["user:1:gigs"])
+    assert two.get("k") == b"payload"
+    two.invalidate(["user:1:gigs"])
+    assert one.get("k") is None
+    assert one.stats()["entries"] == 0
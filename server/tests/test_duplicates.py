@@ -0,0 +1,70 @@
+from app.duplicates import fingerprint
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_fingerprint_ignores_case_accents_featuring_and_mix_labels():
+    base = fingerprint("Röyksopp & Robyn", "Do It Again (Original Mix)")
+    assert fingerprint("robyn and royksopp", "do it again") == base
+    assert fingerprint("ROYKSOPP, Robyn", "Do It Again [feat. Someone]") == base
+    assert fingerprint("Royksopp", "Do It Again – RMX") != base
+    assert fingerprint("Robyn & Royksopp", "Do It Again - Radio Edit") == base
+    assert fingerprint("Robyn x Royksopp", "Do It Again – Extended Mix") == base
+
+def test_fingerprint_keeps_artists_named_like_separators():
+    assert fingerprint("X", "Song") == "x|song"
+    assert fingerprint("Malcolm X", "Song") == "malcolm x|song"
+    assert fingerprint("And One", "Song") == "and one|song"
+    assert fingerprint("Malcolm X", "Song") != fingerprint("Malcolm", "Song")
+    assert fingerprint("Daft Punk", "Ft. Lauderdale") == "daft punk|ft lauderdale"
+    assert fingerprint("Ft. Knox", "Song") == "ft knox|song"
+    assert fingerprint("Featuring", "Song") == "featuring|song"
+    assert fingerprint("Daft Punk feat. Pharrell", "Get Lucky ft. Nile") == "daft punk|get lucky"
+
+def test_duplicates_groups_exact_and_fuzzy_matches(client):
+    signup(client)
+    a = client.post("/api/tracks", json={"title": "Strobe (Original Mix)", "artist": "deadmau5"}).get_json()
+    b = client.post("/api/tracks", json={"title": "strobe", "artist": "Deadmau5"}).get_json()
+    c = client.post("/api/tracks", json={"title": "Ghosts n Stuff", "artist": "deadmau5"}).get_json()
+    d = client.post("/api/tracks", json={"title": "Ghost n Stuff", "artist": "Deadmau5"}).get_json()
+    client.post("/api/tracks", json={"title": "Strobe", "artist": "Someone Else"})
+
+    groups = client.get("/api/tracks/duplicates").get_json()["groups"]
+    found = {(g["match"], tuple(t["id"] for t in g["tracks"])) for g in groups}
+    assert found == {("exact", (a["id"], b["id"])), ("fuzzy", (c["id"], d["id"]))}
+
+def test_merge_repoints_set_items_and_deletes_duplicates(client):
+    signup(client)
+    keep = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    dupe = client.post("/api/tracks", json={"title": "song", "artist": "a"}).get_json()
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set", "gig_id": g["id"]}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_ids": [keep["id"], dupe["id"]]})
+
+    r = client.post(f"/api/tracks/{keep['id']}/merge", json={"duplicate_ids": [dupe["id"]]})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["repointed"] == 1
+    assert body["track"]["play_count"] == 2
+
+    items = client.get(f"/api/sets/{s['id']}/items").get_json()["items"]
+    assert [i["track_id"] for i in items] == [keep["id"], keep["id"]]
+    assert client.get(f"/api/tracks/{dupe['id']}").status_code == 404
+    assert client.get("/api/tracks/duplicates").get_json()["groups"] == []
+
+    assert client.post(f"/api/tracks/{keep['id']}/merge", json={"duplicate_ids": [keep["id"]]}).status_code == 400
+    assert client.post(f"/api/tracks/{keep['id']}/merge", json={"duplicate_ids": [999]}).status_code == 404
+    assert client.post(f"/api/tracks/{keep['id']}/merge", json={"duplicate_ids": [True]}).status_code == 400
+
+def test_merge_keeps_loaded_suggestions_working(client):
+    signup(client)
+    keep = client.post("/api/tracks", json={"title": "Song", "artist": "A", "bpm": 124, "musical_key": "8A"}).get_json()
+    dupe = client.post("/api/tracks", json={"title": "song", "artist": "a", "bpm": 124, "musical_key": "8A"}).get_json()
+    other = client.post("/api/tracks", json={"title": "Other", "artist": "B", "bpm": 125, "musical_key": "8A"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": keep["id"]})
+    assert client.get(f"/api/sets/{s['id']}/suggestions").status_code == 200
+
+    assert client.post(f"/api/tracks/{keep['id']}/merge", json={"duplicate_ids": [dupe["id"]]}).status_code == 200
+    ids = [x["track"]["id"] for x in client.get(f"/api/sets/{s['id']}/suggestions").get_json()["suggestions"]]
+    assert ids == [other["id"]]
@@ -0,0 +1,71 @@
+from app import create_app, db
+
+def make_app(tmp_path, **config):
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "SECRET_KEY": "test-secret",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "CACHE_BACKEND": "none",
+        **config,
+    })
+
+def pragma(name):
+    return db.session.connection().exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_tuned_profile_puts_sqlite_in_wal_mode(tmp_path):
+    app = make_app(tmp_path, DB_PROFILE="tuned", SQLITE_BUSY_TIMEOUT_MS=1234)
+    with app.app_context():
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1
+        assert pragma("busy_timeout") == 1234
+        db.session.remove()
+        db.engine.dispose()
+
+    app = make_app(tmp_path, DB_PROFILE="default", SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'plain.db'}")
+    with app.app_context():
+        assert pragma("journal_mode") == "delete"
+        db.session.remove()
+        db.engine.dispose()
+
+def test_get_requests_read_from_the_replica_unless_the_client_just_wrote(tmp_path):
+    app = make_app(tmp_path, DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}", REPLICA_STICKY_SECONDS=60)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions["db_replica"])
+    client = app.test_client()
+    client.post("/api/signup", json={"username": "Lani", "email": "lani@example.com", "password": "password1"})
+    client.post("/api/tracks", json={"title": "Song", "artist": "A"})
+
+    assert len(client.get("/api/tracks").get_json()["tracks"]) == 1
+
+    app.config["REPLICA_STICKY_SECONDS"] = 0
+    assert client.get("/api/tracks").get_json()["tracks"] == []
+    assert client.post("/api/tracks", json={"title": "Other", "artist": "B"}).status_code == 201
+
+    app.extensions["db_replica"].dispose()
+    with app.app_context():
+        db.engine.dispose()
+
+def test_replica_reads_are_not_stored_in_the_response_cache(tmp_path):
+    app = make_app(tmp_path, DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}", CACHE_BACKEND="memory", REPLICA_STICKY_SECONDS=0)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions["db_replica"])
+    client = app.test_client()
+    client.post("/api/signup", json={"username": "Lani", "email": "lani@example.com", "password": "password1"})
+    client.post("/api/tracks", json={"title": "Song", "artist": "A"})
+
+    stale = client.get("/api/tracks")
+    assert stale.get_json()["tracks"] == []
+    assert "X-Cache" not in stale.headers
+
+    app.config["REPLICA_STICKY_SECONDS"] = 60
+    fresh = client.get("/api/tracks")
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert len(fresh.get_json()["tracks"]) == 1
+    assert client.get("/api/tracks").headers["X-Cache"] == "HIT"
+
+    app.extensions["db_replica"].dispose()
+    with app.app_context():
+        db.engine.dispose()
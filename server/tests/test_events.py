@@ -0,0 +1,58 @@
+import json
+from app.events import EventBroker
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def read_event(chunks):
+    for chunk in chunks:
+        text = chunk.decode()
+        if text.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in text.strip().splitlines() if not line.startswith("retry"))
+        return fields["event"], json.loads(fields["data"])
+
+def test_event_stream_pushes_the_users_committed_changes(app, client):
+    app.config["EVENTS_HEARTBEAT"] = 0.01
+    signup(client)
+    r = client.get("/api/events", buffered=False)
+    assert r.mimetype == "text/event-stream"
+    chunks = iter(r.response)
+    event, data = read_event(chunks)
+    assert event == "hello"
+
+    other = app.test_client()
+    signup(other, email="other@example.com")
+    other.post("/api/tracks", json={"title": "Not mine", "artist": "B"})
+
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]})
+
+    events = [read_event(chunks) for _ in range(3)]
+    assert [(e["entity"], e["op"], e["id"]) for _, e in events][:2] == [("track", "create", t["id"]), ("set", "create", s["id"])]
+    assert events[2][1]["entity"] == "set_item" and events[2][1]["set_id"] == s["id"]
+    assert events[2][1]["version"] > events[0][1]["version"] > data["version"]
+
+    assert client.get("/api/events/stats").get_json()["connections"] == 1
+    r.close()
+    assert client.get("/api/events/stats").get_json()["connections"] == 0
+
+def test_streams_that_are_never_read_are_released(app, client):
+    signup(client)
+    for _ in range(app.extensions["event_broker"].max_per_user):
+        client.head("/api/events").close()
+    assert client.get("/api/events/stats").get_json()["connections"] == 0
+    r = client.get("/api/events", buffered=False)
+    assert r.status_code == 200
+    r.close()
+
+def test_slow_consumers_are_dropped_and_told_to_resync():
+    broker = EventBroker(queue_size=2)
+    slow, fast = broker.subscribe(1), broker.subscribe(1)
+    for n in range(3):
+        broker.publish(1, {"n": n})
+        fast.get(0)
+    assert slow.overflowed and slow.get(0) is None
+    assert not fast.overflowed
+    assert broker.stats() == {"users": 1, "connections": 1, "published": 3, "dropped": 1}
@@ -0,0 +1,62 @@
+import csv
+import gzip
+import io
+import json
+from sqlalchemy import event
+from app import db
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def seed(client):
+    t = client.post("/api/tracks", json={"title": "Song, with comma", "artist": "A", "bpm": 124}).get_json()
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set", "gig_id": g["id"]}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]})
+
+def test_export_streams_ndjson_for_the_current_user_only(client):
+    signup(client, email="other@example.com")
+    client.post("/api/tracks", json={"title": "Not mine", "artist": "B"})
+    client.delete("/api/logout")
+    signup(client)
+    seed(client)
+
+    r = client.get("/api/export")
+    assert r.status_code == 200
+    assert r.is_streamed
+    assert r.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [row["type"] for row in rows] == ["track", "gig", "set", "set_item"]
+    assert rows[0]["title"] == "Song, with comma"
+    assert rows[1]["gig_date"] == "2026-03-01"
+    assert rows[3]["track_id"] == rows[0]["id"]
+
+def test_export_csv_with_gzip_and_include(client):
+    signup(client)
+    seed(client)
+
+    r = client.get("/api/export?format=csv&include=tracks,items", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(r.get_data()).decode())))
+    assert [row["type"] for row in rows] == ["track", "set_item"]
+    assert rows[0]["title"] == "Song, with comma"
+    assert rows[0]["play_count"] == "1"
+
+    r = client.get("/api/export?format=csv", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in r.headers
+    assert r.get_data(as_text=True).startswith("type,")
+
+    assert client.get("/api/export?include=tracks,users").status_code == 400
+    assert client.get("/api/export?format=xml").status_code == 400
+
+def test_export_returns_its_connection_when_the_body_is_never_read(app, client):
+    signup(client)
+    seed(client)
+    checked_out = []
+    event.listen(db.engine, "checkout", lambda *args: checked_out.append(1))
+    event.listen(db.engine, "checkin", lambda *args: checked_out.pop())
+
+    client.head("/api/export").close()
+    r = client.get("/api/export", buffered=False)
+    r.close()
+    assert checked_out == []
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_gig_cursor_pages_walk_dated_then_undated_gigs(client):
+    signup(client)
+    for day in ("2025-01-10", "2025-03-01", None, "2025-03-01", "2024-12-31", None):
+        client.post("/api/gigs", json={"title": f"Gig {day}", "gig_date": day})
+    expected = [g["id"] for g in client.get("/api/gigs").get_json()["gigs"]]
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"/api/gigs?limit=2&cursor={cursor}").get_json()
+        seen += [g["id"] for g in page["gigs"]]
+        cursor = page["next_cursor"]
+    assert seen == expected
+
+    r = client.get("/api/gigs?from=2025-01-01&to=2025-02-28&limit=5").get_json()
+    assert [g["gig_date"] for g in r["gigs"]] == ["2025-01-10"]
+    assert client.get("/api/gigs?from=soon").status_code == 400
+    assert client.get("/api/gigs?cursor=bogus").status_code == 400
+    assert client.get("/api/gigs?limit=abc").status_code == 400
+
+def test_upcoming_gigs_and_calendar(client):
+    signup(client)
+    today = date.today()
+    for offset in (-3, 9, 2, 2):
+        client.post("/api/gigs", json={"title": "Gig", "gig_date": (today + timedelta(days=offset)).isoformat()})
+
+    page = client.get("/api/gigs?upcoming=1&limit=2").get_json()
+    assert [g["gig_date"] for g in page["gigs"]] == [(today + timedelta(days=2)).isoformat()] * 2
+    rest = client.get(f"/api/gigs?upcoming=1&limit=2&cursor={page['next_cursor']}").get_json()
+    assert [g["gig_date"] for g in rest["gigs"]] == [(today + timedelta(days=9)).isoformat()]
+
+    client.post("/api/gigs", json={"title": "A", "gig_date": "2031-03-01"})
+    client.post("/api/gigs", json={"title": "B", "gig_date": "2031-03-01"})
+    client.post("/api/gigs", json={"title": "C", "gig_date": "2031-03-31"})
+    client.post("/api/gigs", json={"title": "D", "gig_date": "2031-04-01"})
+    r = client.get("/api/gigs/calendar?month=2031-03").get_json()
+    assert r["days"] == [{"date": "2031-03-01", "count": 2}, {"date": "2031-03-31", "count": 1}]
+    assert r["total"] == 3
+    assert client.get("/api/gigs/calendar?month=2031-13").status_code == 400
+
+def test_today_dependent_gig_views_roll_over_with_the_date(client, monkeypatch):
+    import app.routes.gigs as gigs
+
+    class FakeDate(date):
+        current = date(2031, 3, 31)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    monkeypatch.setattr(gigs, "date", FakeDate)
+    signup(client)
+    client.post("/api/gigs", json={"title": "A", "gig_date": "2031-03-31"})
+
+    calendar = client.get("/api/gigs/calendar")
+    upcoming = client.get("/api/gigs?upcoming=1")
+    assert calendar.get_json()["month"] == "2031-03"
+    assert len(upcoming.get_json()["gigs"]) == 1
+
+    FakeDate.current = date(2031, 4, 1)
+    r = client.get("/api/gigs/calendar", headers={"If-None-Match": calendar.headers["ETag"]})
+    assert r.status_code == 200
+    assert (r.get_json()["month"], r.get_json()["days"]) == ("2031-04", [])
+    r = client.get("/api/gigs?upcoming=1", headers={"If-None-Match": upcoming.headers["ETag"]})
+    assert r.status_code == 200
+    assert r.get_json()["gigs"] == []
+
+    assert client.get("/api/gigs/calendar?month=9999-12").status_code == 400
@@ -0,0 +1,32 @@
+from app import create_app, db
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_metrics_and_server_timing(client):
+    signup(client)
+    client.post("/api/tracks", json={"title": "Song", "artist": "A"})
+
+    r = client.get("/api/tracks")
+    assert r.status_code == 200
+    assert 'db;dur=' in r.headers["Server-Timing"]
+    assert 'desc="' in r.headers["Server-Timing"]
+    assert "app;dur=" in r.headers["Server-Timing"]
+
+    r = client.get("/api/metrics")
+    assert r.status_code == 200
+    text = r.get_data(as_text=True)
+    assert "# TYPE setlist_request_seconds summary" in text
+    assert 'setlist_request_seconds{endpoint="tracks.list_tracks",quantile="0.99"}' in text
+    assert 'setlist_request_queries_count{endpoint="tracks.create_track"} 1' in text
+    assert 'setlist_response_bytes_sum{endpoint="tracks.list_tracks"}' in text
+
+def test_metrics_disabled():
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://", "METRICS_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        r = client.get("/api/health")
+        assert "Server-Timing" not in r.headers
+        assert client.get("/api/metrics").status_code == 404
+        db.drop_all()
@@ -0,0 +1,49 @@
+import random
+import time
+from app.optimizer import cost_matrix, optimize_order, path_cost
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_optimize_order_respects_pins_and_budget():
+    rng = random.Random(7)
+    keys = [f"{n}{letter}" for n in range(1, 13) for letter in "AB"]
+    rows = [(rng.randint(100, 140), rng.choice(keys), str(rng.randint(1, 10))) for _ in range(200)]
+    costs = cost_matrix(rows)
+
+    started = time.perf_counter()
+    order, cost = optimize_order(costs, budget_ms=150, first=5, last=17)
+    assert time.perf_counter() - started < 0.5
+    assert sorted(order) == list(range(200))
+    assert order[0] == 5 and order[-1] == 17
+    assert cost == path_cost(costs, order)
+    assert cost < path_cost(costs, list(range(200)))
+
+def test_optimize_set_endpoint(client):
+    signup(client)
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    specs = [(128, "8A", "9"), (120, "8A", "3"), (126, "9A", "7"), (90, "3B", "1"), (122, "8A", "5"), (124, "9A", "6")]
+    item_ids = []
+    for n, (bpm, key, energy) in enumerate(specs):
+        t = client.post("/api/tracks", json={"title": f"T{n}", "artist": "A", "bpm": bpm, "musical_key": key, "energy": energy}).get_json()
+        item_ids.append(client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]}).get_json()["id"])
+
+    r = client.post(f"/api/sets/{s['id']}/optimize", json={"budget_ms": 100, "opener_item_id": item_ids[1]})
+    assert r.status_code == 200
+    d = r.get_json()
+    assert sorted(d["order"]) == sorted(item_ids)
+    assert d["order"][0] == item_ids[1]
+    assert d["cost"] < d["current_cost"]
+    assert d["applied"] is False
+    assert [i["id"] for i in client.get(f"/api/sets/{s['id']}").get_json()["items"]] == item_ids
+
+    r = client.post(f"/api/sets/{s['id']}/optimize", json={"apply": True, "closer_item_id": item_ids[3]})
+    d = r.get_json()
+    assert d["applied"] is True
+    assert d["order"][-1] == item_ids[3]
+    assert [i["id"] for i in client.get(f"/api/sets/{s['id']}").get_json()["items"]] == d["order"]
+
+    r = client.post(f"/api/sets/{s['id']}/optimize", json={"opener_item_id": 9999})
+    assert r.status_code == 400
+    assert client.post(f"/api/sets/{s['id']}/optimize", json={"opener_item_id": [1]}).status_code == 400
+    assert client.post(f"/api/sets/{s['id']}/optimize", json={"closer_item_id": True}).status_code == 400
@@ -0,0 +1,44 @@
+import msgpack
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_sparse_fieldsets_narrow_payload_and_sql(client, assert_max_queries):
+    signup(client)
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A", "bpm": 124, "notes": "long notes"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"], "notes": "fade in"})
+
+    with assert_max_queries(3, only="SELECT") as queries:
+        r = client.get("/api/tracks?limit=10&fields=title,bpm")
+    assert r.get_json()["tracks"] == [{"id": t["id"], "title": "Song", "bpm": 124}]
+    assert not any("tracks.notes" in q for q in queries)
+
+    with assert_max_queries(4, only="SELECT") as queries:
+        r = client.get(f"/api/sets/{s['id']}?fields=name,items&fields[item]=position,track&fields[track]=title")
+    data = r.get_json()
+    assert data == {"id": s["id"], "name": "Set", "items": [{"id": data["items"][0]["id"], "position": 0, "track": {"id": t["id"], "title": "Song"}}]}
+    assert not any("tracks.notes" in q or "set_items.notes" in q for q in queries)
+
+    r = client.get(f"/api/sets/{s['id']}/items?fields=notes")
+    assert r.get_json()["items"][0] == {"id": data["items"][0]["id"], "notes": "fade in"}
+
+    r = client.get("/api/tracks?fields=title,password_hash")
+    assert r.status_code == 400
+    assert "password_hash" in r.get_json()["error"]
+
+def test_msgpack_is_negotiated_and_cached_separately(client):
+    signup(client)
+    client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"})
+
+    as_json = client.get("/api/gigs")
+    r = client.get("/api/gigs", headers={"Accept": "application/msgpack"})
+    assert r.mimetype == "application/msgpack"
+    assert r.headers["X-Cache"] == "MISS"
+    assert "Accept" in r.headers["Vary"]
+    assert msgpack.unpackb(r.get_data()) == as_json.get_json()
+    assert r.headers["ETag"] != as_json.headers["ETag"]
+
+    r = client.get("/api/gigs", headers={"Accept": "application/msgpack"})
+    assert r.headers["X-Cache"] == "HIT"
+    assert r.mimetype == "application/msgpack"
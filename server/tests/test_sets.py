@@ -17,10 +17,126 @@ def test_sets_and_items_flow(client):
     sd = r.get_json()
     assert len(sd["items"]) == 2
     assert sd["items"][0]["position"] == 0
-    assert sd["items"][1]["position"] == 1
+    assert sd["items"][1]["position"] > sd["items"][0]["position"]
 
     r = client.put(f"/api/sets/{set_id}/items/reorder", json={"order": [i2["id"], i1["id"]]})
     assert r.status_code == 200
     items = r.get_json()["items"]
     assert items[0]["id"] == i2["id"]
     assert items[0]["position"] == 0
+
+def test_set_endpoints_do_not_issue_per_item_queries(client, assert_max_queries):
+    signup(client)
+    s = client.post("/api/sets", json={"name": "Long Set"}).get_json()
+    item_ids = []
+    for i in range(12):
+        t = client.post("/api/tracks", json={"title": f"Song {i}", "artist": "A"}).get_json()
+        item_ids.append(client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]}).get_json()["id"])
+
+    with assert_max_queries(3):
+        r = client.get(f"/api/sets/{s['id']}")
+    assert len(r.get_json()["items"]) == 12
+
+    with assert_max_queries(3):
+        r = client.get(f"/api/sets/{s['id']}/items")
+    assert r.get_json()["items"][0]["track"]["title"] == "Song 0"
+
+    with assert_max_queries(3, only="SELECT"):
+        r = client.put(f"/api/sets/{s['id']}/items/reorder", json={"order": item_ids[::-1]})
+    assert r.get_json()["items"][0]["id"] == item_ids[-1]
+
+def test_move_item_touches_one_row_and_rebalances_when_gaps_run_out(client, assert_max_queries):
+    signup(client)
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    ids = []
+    for i in range(5):
+        t = client.post("/api/tracks", json={"title": f"Song {i}", "artist": "A"}).get_json()
+        ids.append(client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]}).get_json()["id"])
+
+    def order():
+        return [i["id"] for i in client.get(f"/api/sets/{s['id']}/items").get_json()["items"]]
+
+    with assert_max_queries(1, only="UPDATE SET_ITEMS"):
+        r = client.post(f"/api/sets/{s['id']}/items/{ids[4]}/move", json={"after": ids[0]})
+    assert r.status_code == 200
+    assert r.get_json()["rebalanced"] is False
+    assert order() == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+
+    client.post(f"/api/sets/{s['id']}/items/{ids[3]}/move", json={"before": ids[0]})
+    assert order() == [ids[3], ids[0], ids[4], ids[1], ids[2]]
+
+    rebalanced = False
+    for n in range(14):
+        mover = ids[1] if n % 2 == 0 else ids[2]
+        r = client.post(f"/api/sets/{s['id']}/items/{mover}/move", json={"after": ids[0]})
+        assert r.status_code == 200
+        rebalanced = rebalanced or r.get_json()["rebalanced"]
+    assert rebalanced
+    assert order() == [ids[3], ids[0], ids[2], ids[1], ids[4]]
+
+    r = client.post(f"/api/sets/{s['id']}/items/{ids[1]}/move", json={"after": ids[3], "before": ids[4]})
+    assert r.status_code == 400
+
+def test_bulk_add_inserts_tracks_in_one_statement_at_an_insertion_point(client, assert_max_queries):
+    signup(client)
+    s = client.post("/api/sets", json={"name": "Crate"}).get_json()
+    tracks = [client.post("/api/tracks", json={"title": f"Song {i}", "artist": "A"}).get_json()["id"] for i in range(6)]
+
+    with assert_max_queries(1, only="INSERT INTO SET_ITEMS"):
+        r = client.post(f"/api/sets/{s['id']}/items", json={"track_ids": tracks[:2]})
+    assert r.status_code == 201
+    first, last = r.get_json()["added"]
+
+    with assert_max_queries(6, only="SELECT"):
+        r = client.post(f"/api/sets/{s['id']}/items", json={"track_ids": tracks[2:], "after": first})
+    assert r.status_code == 201
+    titles = [i["track"]["title"] for i in r.get_json()["items"]]
+    assert titles == ["Song 0", "Song 2", "Song 3", "Song 4", "Song 5", "Song 1"]
+
+    r = client.post(f"/api/sets/{s['id']}/items", json={"track_ids": [tracks[0]], "before": first})
+    assert [i["track"]["title"] for i in r.get_json()["items"]][:2] == ["Song 0", "Song 0"]
+    assert len(client.get(f"/api/sets/{s['id']}").get_json()["items"]) == 7
+
+def test_bulk_add_rejects_tracks_owned_by_someone_else(client):
+    signup(client, email="other@example.com")
+    foreign = client.post("/api/tracks", json={"title": "Theirs", "artist": "B"}).get_json()["id"]
+    client.delete("/api/logout")
+
+    signup(client)
+    mine = client.post("/api/tracks", json={"title": "Mine", "artist": "A"}).get_json()["id"]
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    r = client.post(f"/api/sets/{s['id']}/items", json={"track_ids": [mine, foreign]})
+    assert r.status_code == 404
+    assert r.get_json()["track_ids"] == [foreign]
+    assert client.get(f"/api/sets/{s['id']}").get_json()["items"] == []
+    assert client.post(f"/api/sets/{s['id']}/items", json={"track_ids": [True]}).status_code == 400
+
+def test_list_sets_summary_is_one_grouped_query_and_follows_changes(client, assert_max_queries):
+    signup(client)
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    s = client.post("/api/sets", json={"name": "Main", "gig_id": g["id"]}).get_json()
+    empty = client.post("/api/sets", json={"name": "Empty"}).get_json()
+    ids = [
+        client.post("/api/tracks", json={"title": f"Song {bpm}", "artist": "A", "bpm": bpm, "musical_key": key}).get_json()["id"]
+        for bpm, key in [(120, "8A"), (124, "8A"), (None, "9A"), (128, None)]
+    ]
+    client.post(f"/api/sets/{s['id']}/items", json={"track_ids": ids})
+
+    with assert_max_queries(3, only="SELECT") as queries:
+        r = client.get("/api/sets?include=summary")
+    assert sum("GROUP BY" in q for q in queries) == 1
+    sets = {x["id"]: x["summary"] for x in r.get_json()["sets"]}
+    assert sets[s["id"]] == {
+        "items": 4,
+        "bpm": {"min": 120, "max": 128, "avg": 124.0},
+        "keys": {"8A": 2, "9A": 1},
+        "gig": {"id": g["id"], "title": "Club", "venue": None, "gig_date": "2026-03-01"},
+    }
+    assert sets[empty["id"]] == {"items": 0, "bpm": {"min": None, "max": None, "avg": None}, "keys": {}, "gig": None}
+    assert "summary" not in client.get("/api/sets").get_json()["sets"][0]
+
+    assert client.get("/api/sets?include=summary").headers["X-Cache"] == "HIT"
+    client.patch(f"/api/tracks/{ids[3]}", json={"musical_key": "9A"})
+    r = client.get("/api/sets?include=summary")
+    assert r.headers["X-Cache"] == "MISS"
+    assert {x["id"]: x["summary"] for x in r.get_json()["sets"]}[s["id"]]["keys"] == {"8A": 2, "9A": 2}
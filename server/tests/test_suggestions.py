@@ -0,0 +1,94 @@
+import time
+from app.harmony import parse_camelot
+from app.suggestions import LibraryIndex
+
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def track(client, title, bpm, key, energy):
+    return client.post("/api/tracks", json={"title": title, "artist": "A", "bpm": bpm, "musical_key": key, "energy": energy}).get_json()
+
+def test_parse_camelot_accepts_camelot_and_note_names():
+    assert parse_camelot("8A") == (8, 0)
+    assert parse_camelot("Am") == (8, 0)
+    assert parse_camelot("C") == (8, 1)
+    assert parse_camelot("F#m") == (11, 0)
+    assert parse_camelot("nonsense") == (0, -1)
+
+def test_set_suggestions_rank_and_follow_library_changes(client):
+    signup(client)
+    opener = track(client, "Opener", 124, "8A", "6")
+    best = track(client, "Best", 125, "8A", "7")
+    adjacent = track(client, "Adjacent", 124, "9A", "6")
+    half_time = track(client, "Half Time", 62, "8A", "6")
+    clash = track(client, "Clash", 90, "3B", "2")
+
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": opener["id"]})
+
+    r = client.get(f"/api/sets/{s['id']}/suggestions?limit=10")
+    assert r.status_code == 200
+    d = r.get_json()
+    assert d["after_track_id"] == opener["id"]
+    ids = [x["track"]["id"] for x in d["suggestions"]]
+    assert opener["id"] not in ids
+    assert ids[0] == best["id"]
+    assert ids.index(adjacent["id"]) < ids.index(clash["id"])
+    assert ids.index(half_time["id"]) < ids.index(clash["id"])
+    assert ids[-1] == clash["id"]
+
+    client.patch(f"/api/tracks/{clash['id']}", json={"bpm": 124, "musical_key": "8A", "energy": "6.5"})
+    client.delete(f"/api/tracks/{best['id']}")
+    ids = [x["track"]["id"] for x in client.get(f"/api/sets/{s['id']}/suggestions").get_json()["suggestions"]]
+    assert best["id"] not in ids
+    assert ids[0] == clash["id"]
+
+    empty = client.post("/api/sets", json={"name": "Empty"}).get_json()
+    assert client.get(f"/api/sets/{empty['id']}/suggestions").status_code == 400
+
+def test_suggestions_survive_writes_that_only_refresh_track_stats(client):
+    signup(client)
+    opener = track(client, "Opener", 124, "8A", "6")
+    other = track(client, "Other", 125, "8A", "7")
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set", "gig_id": g["id"]}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": opener["id"]})
+    assert client.get(f"/api/sets/{s['id']}/suggestions").status_code == 200
+
+    item = client.post(f"/api/sets/{s['id']}/items", json={"track_id": other["id"]})
+    assert item.status_code == 201
+    assert client.patch(f"/api/gigs/{g['id']}", json={"gig_date": "2026-04-01"}).status_code == 200
+    assert client.delete(f"/api/sets/{s['id']}/items/{item.get_json()['id']}").status_code in (200, 204)
+    ids = [x["track"]["id"] for x in client.get(f"/api/sets/{s['id']}/suggestions").get_json()["suggestions"]]
+    assert ids == [other["id"]]
+
+def test_suggestions_catch_up_with_writes_from_other_workers(app, client):
+    signup(client)
+    opener = track(client, "Opener", 124, "8A", "6")
+    far = track(client, "Far", 90, "3B", "2")
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": opener["id"]})
+    client.get(f"/api/sets/{s['id']}/suggestions")
+    cache = app.extensions["suggestion_indexes"]
+    index = cache.peek(opener["user_id"])
+
+    # Writes made while the cache is detached stand in for another worker's commits.
+    del app.extensions["suggestion_indexes"]
+    client.patch(f"/api/tracks/{far['id']}", json={"bpm": 125, "musical_key": "8A", "energy": "7"})
+    near = track(client, "Near", 124, "9A", "6")
+    app.extensions["suggestion_indexes"] = cache
+
+    ids = [x["track"]["id"] for x in client.get(f"/api/sets/{s['id']}/suggestions").get_json()["suggestions"]]
+    assert ids == [far["id"], near["id"]]
+    assert cache.peek(opener["user_id"]) is index
+
+def test_library_index_scores_large_library_quickly():
+    keys = [f"{n}{letter}" for n in range(1, 13) for letter in "AB"]
+    rows = [(i, 90 + i % 60, keys[i % len(keys)], str(1 + i % 10)) for i in range(1, 100_001)]
+    index = LibraryIndex(rows)
+    ref = index.reference(1)
+    index.top(ref, 10)
+    started = time.perf_counter()
+    top = index.top(ref, 10, exclude={1})
+    assert time.perf_counter() - started < 0.05
+    assert len(top) == 10
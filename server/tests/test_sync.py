@@ -0,0 +1,54 @@
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_sync_returns_changes_and_tombstones_since_token(client):
+    signup(client)
+    old = client.post("/api/tracks", json={"title": "Old", "artist": "A"}).get_json()
+    token = client.get("/api/sync").get_json()["next"]
+
+    assert client.get(f"/api/sync?since={token}").get_json()["tracks"] == []
+
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set", "gig_id": g["id"]}).get_json()
+    item = client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]}).get_json()
+    client.patch(f"/api/tracks/{t['id']}", json={"bpm": 124})
+    client.delete(f"/api/tracks/{old['id']}")
+
+    data = client.get(f"/api/sync?since={token}").get_json()
+    assert [x["bpm"] for x in data["tracks"]] == [124]
+    assert data["tracks"][0]["play_count"] == 1
+    assert [x["id"] for x in data["gigs"]] == [g["id"]]
+    assert [x["id"] for x in data["sets"]] == [s["id"]]
+    assert [x["id"] for x in data["set_items"]] == [item["id"]]
+    assert data["deleted"]["tracks"] == [old["id"]]
+    assert data["has_more"] is False
+
+    client.delete(f"/api/sets/{s['id']}")
+    later = client.get(f"/api/sync?since={data['next']}").get_json()
+    assert later["deleted"]["sets"] == [s["id"]]
+    assert later["deleted"]["set_items"] == [item["id"]]
+    assert later["tracks"][0]["play_count"] == 0
+
+def test_sync_pages_and_ignores_other_users(client):
+    signup(client, email="other@example.com")
+    token = client.get("/api/sync").get_json()["next"]
+    client.delete("/api/logout")
+    signup(client)
+    mine = client.get("/api/sync").get_json()["next"]
+    client.post("/api/tracks/import?format=ndjson", data="\n".join(
+        f'{{"title": "Song {i}", "artist": "A"}}' for i in range(5)
+    ))
+
+    seen, has_more = [], True
+    while has_more:
+        page = client.get(f"/api/sync?since={mine}&limit=2").get_json()
+        seen += [t["title"] for t in page["tracks"]]
+        mine, has_more = page["next"], page["has_more"]
+    assert seen == [f"Song {i}" for i in range(5)]
+
+    assert client.get("/api/sync?since=bogus").status_code == 400
+    assert client.get(f"/api/sync?since={mine}&limit=abc").status_code == 400
+    client.delete("/api/logout")
+    client.post("/api/login", json={"email": "other@example.com", "password": "password1"})
+    assert client.get(f"/api/sync?since={token}").get_json()["tracks"] == []
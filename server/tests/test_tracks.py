@@ -1,3 +1,7 @@
+from sqlalchemy import update
+from app import db
+from app.models import Track
+
 def signup(client, username="Lani", email="lani@example.com", password="password1"):
     return client.post("/api/signup", json={"username": username, "email": email, "password": password})
 
@@ -72,4 +76,158 @@ def test_track_usage_endpoint(client):
     assert d["track"]["id"] == t["id"]
     assert len(d["usage"]) == 1
     assert d["usage"][0]["gig"]["id"] == g["id"]
+    assert d["usage"][0]["index"] == 0
     assert d["last_played"] == "2026-02-20"
+
+def test_tracks_search_prefix_fields_and_sync(client):
+    signup(client)
+    daft = client.post("/api/tracks", json={"title": "Around the World", "artist": "Daft Punk", "energy": "peak"}).get_json()
+    client.post("/api/tracks", json={"title": "Daft Days", "artist": "Someone Else"})
+    client.post("/api/tracks", json={"title": "Strings of Life", "artist": "Rhythim Is Rhythim"})
+
+    r = client.get("/api/tracks?q=arou")
+    assert [t["id"] for t in r.get_json()["tracks"]] == [daft["id"]]
+
+    r = client.get("/api/tracks?q=daft")
+    assert r.get_json()["total"] == 2
+
+    r = client.get("/api/tracks?q=artist:daft")
+    assert [t["id"] for t in r.get_json()["tracks"]] == [daft["id"]]
+
+    client.patch(f"/api/tracks/{daft['id']}", json={"title": "One More Time"})
+    assert client.get("/api/tracks?q=around").get_json()["total"] == 0
+    assert client.get("/api/tracks?q=title:one+artist:daft").get_json()["total"] == 1
+
+    client.delete(f"/api/tracks/{daft['id']}")
+    assert client.get("/api/tracks?q=artist:daft").get_json()["total"] == 0
+
+def test_tracks_cursor_pagination(client):
+    signup(client)
+    for i in range(25):
+        client.post("/api/tracks", json={"title": f"Song {i:02d}", "artist": "Noelani"})
+
+    seen = []
+    cursor = ""
+    while True:
+        r = client.get(f"/api/tracks?cursor={cursor}&limit=10")
+        assert r.status_code == 200
+        d = r.get_json()
+        assert "total" not in d
+        seen.extend(t["id"] for t in d["tracks"])
+        if not d["next_cursor"]:
+            break
+        cursor = d["next_cursor"]
+    assert len(seen) == 25
+    assert seen == sorted(seen, reverse=True)
+
+    d = client.get("/api/tracks?cursor=&limit=10&sort=title&include_total=1").get_json()
+    assert d["total"] == 25
+    assert d["tracks"][0]["title"] == "Song 00"
+    d = client.get(f"/api/tracks?cursor={d['next_cursor']}&limit=10&sort=title").get_json()
+    assert d["tracks"][0]["title"] == "Song 10"
+
+    r = client.get(f"/api/tracks?cursor={d['next_cursor']}&sort=-id")
+    assert r.status_code == 400
+    assert client.get("/api/tracks?cursor=WyItaWQiLHt9XQ&limit=10").status_code == 400
+    assert client.get("/api/tracks?limit=abc").status_code == 400
+    assert client.get("/api/tracks/stats?limit=abc").status_code == 400
+    assert client.get("/api/tracks/duplicates?limit=abc").status_code == 400
+
+def test_tracks_bulk_import(client):
+    signup(client)
+
+    body = "title,artist,bpm,key\nSong A,Artist A,124,8A\n,Missing Title,120,\nSong B,Artist B,fast,\nSong C,Artist C,,9A\n"
+    r = client.post("/api/tracks/import?format=csv", data=body, content_type="text/csv")
+    assert r.status_code == 200
+    d = r.get_json()
+    assert d["rows"] == 4
+    assert d["imported"] == 2
+    assert [e["row"] for e in d["errors"]] == [3, 4]
+    assert d["errors"][1]["error"] == "bpm must be an integer"
+    assert d["rows_per_sec"] is not None
+
+    ndjson = '{"title": "Song D", "artist": "Artist D", "bpm": 126}\nnot json\n'
+    d = client.post("/api/tracks/import", data=ndjson, content_type="application/x-ndjson").get_json()
+    assert d["imported"] == 1
+    assert d["errors"] == [{"row": 2, "error": "invalid JSON"}]
+
+    ndjson = '{"title": 5, "artist": "A"}\n{"title": "Song", "artist": []}\n{"title": "Song", "artist": "A", "musical_key": 8}\n'
+    d = client.post("/api/tracks/import", data=ndjson, content_type="application/x-ndjson").get_json()
+    assert d["imported"] == 0
+    assert [e["error"] for e in d["errors"]] == ["title must be a string", "artist must be a string", "musical_key must be a string"]
+
+    xml = (
+        '<DJ_PLAYLISTS><COLLECTION Entries="1">'
+        '<TRACK TrackID="1" Name="Song E" Artist="Artist E" AverageBpm="127.98" Tonality="10A"/>'
+        '</COLLECTION><PLAYLISTS><NODE Name="ROOT"><TRACK Key="1"/></NODE></PLAYLISTS></DJ_PLAYLISTS>'
+    )
+    d = client.post("/api/tracks/import", data=xml, content_type="application/xml").get_json()
+    assert d["imported"] == 1
+
+    r = client.get("/api/tracks?q=artist:artist+e")
+    t = r.get_json()["tracks"][0]
+    assert t["bpm"] == 128
+    assert t["musical_key"] == "10A"
+    assert client.get("/api/tracks").get_json()["total"] == 4
+
+def test_play_stats_follow_set_and_gig_changes(app, client):
+    signup(client)
+    hit = client.post("/api/tracks", json={"title": "Hit", "artist": "A"}).get_json()
+    deep = client.post("/api/tracks", json={"title": "Deep Cut", "artist": "B"}).get_json()
+    gig = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-03-01"}).get_json()
+    played = client.post("/api/sets", json={"name": "Played", "gig_id": gig["id"]}).get_json()
+    draft = client.post("/api/sets", json={"name": "Draft"}).get_json()
+    client.post(f"/api/sets/{played['id']}/items", json={"track_ids": [hit["id"], hit["id"]]})
+    client.post(f"/api/sets/{draft['id']}/items", json={"track_id": hit["id"]})
+
+    t = client.get(f"/api/tracks/{hit['id']}").get_json()
+    assert (t["play_count"], t["set_count"], t["last_played"]) == (2, 2, "2026-03-01")
+
+    client.patch(f"/api/gigs/{gig['id']}", json={"gig_date": "2026-04-01"})
+    assert client.get(f"/api/tracks/{hit['id']}/usage").get_json()["last_played"] == "2026-04-01"
+
+    r = client.get("/api/tracks?limit=10&sort=-play_count").get_json()
+    assert [x["title"] for x in r["tracks"]] == ["Hit", "Deep Cut"]
+    assert [x["title"] for x in client.get("/api/tracks?played=0").get_json()["tracks"]] == ["Deep Cut"]
+    assert client.get("/api/tracks?played_since=2026-05-01").get_json()["tracks"] == []
+
+    stats = client.get("/api/tracks/stats").get_json()
+    assert (stats["tracks"], stats["played"], stats["never_played"], stats["total_plays"]) == (2, 1, 1, 2)
+    assert stats["most_played"][0]["id"] == hit["id"]
+
+    client.delete(f"/api/gigs/{gig['id']}")
+    t = client.get(f"/api/tracks/{hit['id']}").get_json()
+    assert (t["play_count"], t["set_count"], t["last_played"]) == (0, 2, None)
+    assert client.get("/api/tracks/stats").get_json()["total_plays"] == 0
+
+    with app.app_context():
+        db.session.execute(update(Track).values(play_count=99, set_count=99))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=["stats-rebuild"])
+    assert "rebuilt" in result.output
+    assert client.get(f"/api/tracks/{hit['id']}").get_json()["set_count"] == 2
+
+def test_attribute_filters_and_facets(client):
+    signup(client)
+    for title, bpm, key, energy in [
+        ("A", 122, "8A", "peak"), ("B", 124, "9A", "peak"), ("C", 126, "8A", "build"),
+        ("D", 128, "8A", "peak"), ("E", None, None, "peak"),
+    ]:
+        client.post("/api/tracks", json={"title": title, "artist": "X", "bpm": bpm, "musical_key": key, "energy": energy})
+
+    r = client.get("/api/tracks?bpm_min=122&bpm_max=126&key=8a,9A&energy=peak&limit=10").get_json()
+    assert [t["title"] for t in r["tracks"]] == ["B", "A"]
+    assert client.get("/api/tracks?bpm_min=fast").status_code == 400
+
+    r = client.get("/api/tracks?energy=peak&facets=bpm,key,energy").get_json()
+    assert r["total"] == 4
+    assert r["facets"]["bpm"] == [
+        {"min": 120, "max": 124, "count": 2}, {"min": 125, "max": 129, "count": 1}, {"min": None, "max": None, "count": 1},
+    ]
+    assert r["facets"]["key"][0] == {"value": "8A", "count": 2}
+    assert r["facets"]["energy"] == [{"value": "peak", "count": 4}]
+    assert client.get("/api/tracks?facets=colour").status_code == 400
+
+    client.patch(f"/api/tracks/{r['tracks'][0]['id']}", json={"energy": "build"})
+    r = client.get("/api/tracks?limit=5&energy=peak&facets=energy&include_total=1").get_json()
+    assert (r["total"], r["facets"]["energy"]) == (3, [{"value": "peak", "count": 3}])
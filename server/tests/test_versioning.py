@@ -0,0 +1,70 @@
+def signup(client, username="Lani", email="lani@example.com", password="password1"):
+    return client.post("/api/signup", json={"username": username, "email": email, "password": password})
+
+def test_list_endpoints_answer_304_until_data_changes(client, assert_max_queries):
+    signup(client)
+    client.post("/api/gigs", json={"title": "Gig One"})
+
+    r = client.get("/api/gigs")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    with assert_max_queries(1):
+        r = client.get("/api/gigs", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+
+    assert client.get("/api/tracks?page=2", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/api/tracks", json={"title": "Song", "artist": "A"})
+    r = client.get("/api/gigs", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+def test_set_etag_follows_set_and_track_changes_only(client):
+    signup(client)
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    s = client.post("/api/sets", json={"name": "Set"}).get_json()
+    other = client.post("/api/sets", json={"name": "Other"}).get_json()
+    client.post(f"/api/sets/{s['id']}/items", json={"track_id": t["id"]})
+
+    etag = client.get(f"/api/sets/{s['id']}").headers["ETag"]
+
+    client.patch(f"/api/sets/{other['id']}", json={"name": "Renamed"})
+    client.post("/api/tracks", json={"title": "Unrelated", "artist": "B"})
+    assert client.get(f"/api/sets/{s['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/api/tracks/{t['id']}", json={"bpm": 126})
+    r = client.get(f"/api/sets/{s['id']}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.get_json()["items"][0]["track"]["bpm"] == 126
+
+    etag = r.headers["ETag"]
+    client.patch(f"/api/sets/{s['id']}", json={"notes": "tighter"})
+    assert client.get(f"/api/sets/{s['id']}", headers={"If-None-Match": etag}).status_code == 200
+
+    assert client.get("/api/sets/9999").status_code == 404
+
+def test_play_stat_refresh_reaches_other_sets_containing_the_track(client):
+    signup(client)
+    t = client.post("/api/tracks", json={"title": "Song", "artist": "A"}).get_json()
+    g = client.post("/api/gigs", json={"title": "Club", "gig_date": "2026-01-01"}).get_json()
+    a = client.post("/api/sets", json={"name": "A", "gig_id": g["id"]}).get_json()
+    b = client.post("/api/sets", json={"name": "B"}).get_json()
+    client.post(f"/api/sets/{b['id']}/items", json={"track_id": t["id"]})
+
+    r = client.get(f"/api/sets/{b['id']}")
+    etag = r.headers["ETag"]
+    assert r.get_json()["items"][0]["track"]["play_count"] == 0
+    assert client.get(f"/api/sets/{b['id']}").headers["X-Cache"] == "HIT"
+
+    client.post(f"/api/sets/{a['id']}/items", json={"track_id": t["id"]})
+    r = client.get(f"/api/sets/{b['id']}", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["X-Cache"] == "MISS"
+    assert r.get_json()["items"][0]["track"]["play_count"] == 1
+
+    client.patch(f"/api/gigs/{g['id']}", json={"gig_date": "2026-05-05"})
+    r = client.get(f"/api/sets/{b['id']}")
+    assert r.headers["X-Cache"] == "MISS"
+    assert r.get_json()["items"][0]["track"]["last_played"] == "2026-05-05"